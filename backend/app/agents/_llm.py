@@ -0,0 +1,143 @@
+from langchain_openai import ChatOpenAI
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+from functools import lru_cache
+from typing import Any, Dict, Optional, Type
+from uuid import UUID
+import asyncio
+import httpx
+import logging
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# One connection pool shared by every agent, so keep-alive connections to OpenAI are reused
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+# Per-attempt timeouts. Short answers (voice, substitutions) get the tight default so a stuck call is
+# retried quickly; whole-recipe generations (up to ~2048 tokens) need room to decode.
+DEFAULT_TIMEOUT = 15
+GENERATION_TIMEOUT = 60
+
+@lru_cache(maxsize=None)
+def _http_clients():
+    """(sync, async) pooled httpx clients, created when the first chat model is built"""
+    return httpx.Client(limits=_HTTP_LIMITS), httpx.AsyncClient(limits=_HTTP_LIMITS)
+
+
+def llm_config(agent: str, method: str) -> RunnableConfig:
+    """Run config naming the agent method behind an LLM call, so the timing log can attribute it"""
+    return {"metadata": {"agent": agent, "method": method}}
+
+
+class LLMTimingHandler(BaseCallbackHandler):
+    """
+    Logs time to first token, total latency and token usage for every chat model call,
+    to tell whether prefill (TTFT) or decode (total - TTFT) dominates a slow call.
+    TTFT is only known for streaming calls.
+    """
+    run_inline = True
+
+    def __init__(self):
+        # run_id -> {"start", "first_token", "metadata"}
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        self._runs[run_id] = {"start": time.perf_counter(), "first_token": None, "metadata": metadata or {}}
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.get(run_id)
+        if run is not None and run["first_token"] is None:
+            run["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        total_ms = (time.perf_counter() - run["start"]) * 1000
+        ttft_ms = (run["first_token"] - run["start"]) * 1000 if run["first_token"] is not None else None
+        prompt_tokens, completion_tokens = self._token_usage(response)
+        metadata = run["metadata"]
+        logger.info(
+            "llm_call agent=%s method=%s model=%s ttft_ms=%s total_ms=%.0f prompt_tokens=%s completion_tokens=%s",
+            metadata.get("agent"), metadata.get("method"), metadata.get("ls_model_name"),
+            f"{ttft_ms:.0f}" if ttft_ms is not None else None, total_ms, prompt_tokens, completion_tokens
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
+
+    def _token_usage(self, response: LLMResult):
+        """(prompt tokens, completion tokens) as reported by OpenAI"""
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    return usage.get("input_tokens"), usage.get("output_tokens")
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        return token_usage.get("prompt_tokens"), token_usage.get("completion_tokens")
+
+
+_timing_handler = LLMTimingHandler()
+
+@lru_cache(maxsize=None)
+def get_chat_model(model: str, temperature: float, streaming: bool = False,
+                   max_tokens: Optional[int] = None, json_mode: bool = False,
+                   timeout: float = DEFAULT_TIMEOUT) -> ChatOpenAI:
+    """
+    Shared ChatOpenAI client for a model configuration. Agents call this instead of
+    constructing their own, so each configuration is built once per process.
+    json_mode forces a bare JSON object response (the prompt must mention JSON).
+    timeout is per attempt; pass GENERATION_TIMEOUT for long generations.
+    """
+    http_client, http_async_client = _http_clients()
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        streaming=streaming,
+        # Streamed responses only report token usage when asked to
+        stream_usage=streaming,
+        max_tokens=max_tokens,
+        model_kwargs={"response_format": {"type": "json_object"}} if json_mode else {},
+        request_timeout=timeout,
+        max_retries=2,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        callbacks=[_timing_handler],
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    )
+
+@lru_cache(maxsize=None)
+def get_structured_model(schema: Type[BaseModel], model: str, temperature: float,
+                         max_tokens: Optional[int] = None, timeout: float = DEFAULT_TIMEOUT) -> Runnable:
+    """
+    Shared client that answers with an instance of schema via OpenAI structured outputs.
+    invoke returns {"raw", "parsed", "parsing_error"}; parsed is None when the response
+    didn't validate, and raw keeps the message for fallback handling.
+    """
+    return get_chat_model(model, temperature, max_tokens=max_tokens, timeout=timeout).with_structured_output(
+        schema, method="json_schema", include_raw=True
+    )
+
+
+async def prewarm() -> None:
+    """
+    Send a one-token completion through the sync and async pools at startup, so the first
+    user request doesn't pay DNS, TCP and TLS setup. Failures are logged and ignored.
+    """
+    model = get_chat_model("gpt-4o-mini", temperature=0, max_tokens=1)
+    config = llm_config("startup", "prewarm")
+    try:
+        await asyncio.gather(
+            model.ainvoke("ping", config=config),
+            asyncio.to_thread(model.invoke, "ping", config=config),
+        )
+    except Exception as e:
+        logger.warning("LLM prewarm failed: %s", e)
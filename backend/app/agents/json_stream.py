@@ -0,0 +1,57 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import re
+
+_WHITESPACE_AND_COMMAS = " \t\r\n,"
+
+
+class JsonArrayItemStream:
+    """
+    Pull complete items out of named arrays in a JSON document that arrives in chunks,
+    e.g. a streamed LLM completion. Each item is returned as soon as its closing brace
+    has arrived, without waiting for the rest of the document.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = list(keys)
+        self.buffer = ""
+        self._decoder = json.JSONDecoder()
+        self._key_patterns = {key: re.compile(r'"%s"\s*:\s*\[' % re.escape(key)) for key in self.keys}
+        # key -> buffer offset of the next unread item (None until the array has started)
+        self._positions: Dict[str, Optional[int]] = {key: None for key in self.keys}
+        self._finished = set()
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add a chunk of text and return the (key, item) pairs it completed"""
+        self.buffer += chunk
+        items = []
+        for key in self.keys:
+            if key in self._finished:
+                continue
+            position = self._positions[key]
+            if position is None:
+                match = self._key_patterns[key].search(self.buffer)
+                if not match:
+                    continue
+                position = match.end()
+            position = self._read_items(key, position, items)
+            self._positions[key] = position
+        return items
+
+    def _read_items(self, key: str, position: int, items: List[Tuple[str, Any]]) -> int:
+        buffer = self.buffer
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE_AND_COMMAS:
+                position += 1
+            if position >= len(buffer):
+                return position
+            if buffer[position] == "]":
+                self._finished.add(key)
+                return position
+            try:
+                item, end = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Item is still arriving
+                return position
+            items.append((key, item))
+            position = end
@@ -1,27 +1,188 @@
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Callable, AsyncIterator
 from backend.app.schemas.schemas import (
     OptimizedRecipe, Ingredient, PrepStep, CookStep, 
-    AvailableIngredient, IngredientSubstitution, RecipeModificationResponse
+    AvailableIngredient, IngredientSubstitution, RecipeModificationResponse,
+    SubstitutionSuggestions, RecipeModificationDraft,
+    INGREDIENTS_ADAPTER, PREP_STEPS_ADAPTER, COOK_STEPS_ADAPTER
 )
-from langchain_openai import ChatOpenAI
-import os
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
+from openai import APITimeoutError, BadRequestError, LengthFinishReasonError
+from .response_cache import ResponseCache
+from ._llm import GENERATION_TIMEOUT, get_chat_model, get_structured_model, llm_config
+from .json_stream import JsonArrayItemStream
+from functools import cached_property
 import json
 import re
 from dotenv import load_dotenv
 
 load_dotenv()
+
+# Output caps: a modified recipe (<= ~40 ingredients, ~30 steps) fits comfortably, rambling doesn't
+_MODIFICATION_MAX_TOKENS = 2048
+_SUBSTITUTION_MAX_TOKENS = 1024
+# Requests per batched call: 4 full recipes (8192 tokens) stay well under gpt-4o's 16,384 output token limit
+_BATCH_MAX_REQUESTS = 4
+
+# Shared across RecipeModifier instances so the voice assistant and the API routes reuse each other's results
+_modification_cache = ResponseCache()
+# Substitution lookups repeat across modifications of recipes that share ingredients
+_substitution_cache = ResponseCache()
+
+# Streamed response arrays -> (event type, schema) for astream_modified_recipe
+_STREAMED_ITEMS = {
+    "substitutions": ("substitution", IngredientSubstitution),
+    "ingredients": ("ingredient", Ingredient),
+    "prep_phase": ("prep_step", PrepStep),
+    "cook_phase": ("cook_step", CookStep),
+}
+
+# Raised when JSON model output (streamed or batched) doesn't match the schema
+_SUBSTITUTION_PARSE_ERRORS = (ValueError, TypeError, KeyError, AttributeError)
+
+# Static system prompts come first and are identical across calls so OpenAI can reuse the cached prefix;
+# only the per-recipe details go in the trailing user message.
+_SUBSTITUTION_SYSTEM_PROMPT = """
+You are a culinary expert. Given a recipe's ingredients, suggest substitutions to make the recipe compliant with dietary restrictions
+and workable with the ingredients the user has available.
+
+When dietary restrictions are given:
+- For VEGAN: Replace ALL animal products (meat, dairy, eggs, honey, etc.) with plant-based alternatives
+- For VEGETARIAN: Replace ALL meat products with vegetarian alternatives
+- For GLUTEN-FREE: Replace ALL gluten-containing ingredients (wheat flour, breadcrumbs, etc.)
+- For DAIRY-FREE: Replace ALL dairy products (milk, cheese, butter, cream, etc.)
+You MUST suggest substitutions for ALL ingredients that violate the dietary restrictions, not just missing ingredients.
+
+For each ingredient that needs substitution (either missing or violating dietary restrictions), suggest appropriate alternatives.
+Return a JSON list in this format:
+{
+  "substitutions": [
+    {
+      "original_name": "string",
+      "original_amount": "string",
+      "original_unit": "string",
+      "substitute_name": "string",
+      "substitute_amount": "string",
+      "substitute_unit": "string",
+      "substitution_reason": "string",
+      "substitution_notes": "string"
+    }
+  ]
+}
+"""
+
+_MODIFICATION_SYSTEM_PROMPT = """
+You are a professional chef and recipe modification expert. Modify the recipe you are given based on the available ingredients and requirements.
+
+INSTRUCTIONS:
+1. Substitute every ingredient that is missing from the available ingredients or violates the dietary restrictions
+2. Adjust cooking instructions to work with substituted ingredients
+3. Scale all ingredient amounts proportionally if serving size changes
+4. Modify prep and cooking steps to accommodate substitutions
+5. Ensure the recipe maintains its core flavor profile and cooking method
+6. Update timing estimates if needed
+7. Add notes about any significant changes
+8. CRITICAL: Ensure ALL ingredients comply with dietary restrictions - NO EXCEPTIONS
+
+When dietary restrictions are given:
+- For VEGAN: Replace ALL animal products (meat, dairy, eggs, honey, etc.) with plant-based alternatives
+- For VEGETARIAN: Replace ALL meat products with vegetarian alternatives
+- For GLUTEN-FREE: Replace ALL gluten-containing ingredients (wheat flour, breadcrumbs, etc.)
+- For DAIRY-FREE: Replace ALL dairy products (milk, cheese, butter, cream, etc.)
+
+List every substitution you made, then the modified recipe, in this exact JSON format:
+{
+    "substitutions": [
+        {
+            "original_name": "string",
+            "original_amount": "string",
+            "original_unit": "string",
+            "substitute_name": "string",
+            "substitute_amount": "string",
+            "substitute_unit": "string",
+            "substitution_reason": "string",
+            "substitution_notes": "string"
+        }
+    ],
+    "modified_recipe": {
+        "title": "Modified Recipe Title",
+        "ingredients": [
+            {"name": "ingredient name", "amount": "quantity", "unit": "unit", "notes": "prep notes"}
+        ],
+        "prep_phase": [
+            {"instruction": "prep task", "time_estimate": minutes, "category": "chopping/measuring/preheating/etc"}
+        ],
+        "cook_phase": [
+            {"step_number": 1, "instruction": "cooking step", "time_estimate": minutes, "parallel_tasks": ["task1", "task2"]}
+        ],
+        "total_time": total_minutes,
+        "prep_time": prep_minutes,
+        "cook_time": cook_minutes,
+        "servings": number_of_servings,
+        "difficulty": "easy/medium/hard"
+    }
+}
+"""
+
+_BATCH_MODIFICATION_SYSTEM_PROMPT = """
+You are a professional chef and recipe modification expert. Produce one modified version of the recipe you are given for EACH numbered request.
+
+For each request, substitute ingredients that are missing or violate its dietary restrictions, scale amounts
+to its serving size, and adjust the prep and cooking steps to match.
+
+Return JSON with exactly one entry per request, in request order:
+{
+    "results": [
+        {
+            "request": 1,
+            "substitutions": [
+                {"original_name": "string", "original_amount": "string", "original_unit": "string",
+                 "substitute_name": "string", "substitute_amount": "string", "substitute_unit": "string",
+                 "substitution_reason": "string", "substitution_notes": "string"}
+            ],
+            "modified_recipe": {
+                "title": "Modified Recipe Title",
+                "ingredients": [{"name": "ingredient name", "amount": "quantity", "unit": "unit", "notes": "prep notes"}],
+                "prep_phase": [{"instruction": "prep task", "time_estimate": minutes, "category": "chopping/measuring/preheating/etc"}],
+                "cook_phase": [{"step_number": 1, "instruction": "cooking step", "time_estimate": minutes, "parallel_tasks": ["task1"]}],
+                "total_time": total_minutes,
+                "prep_time": prep_minutes,
+                "cook_time": cook_minutes,
+                "servings": number_of_servings,
+                "difficulty": "easy/medium/hard"
+            }
+        }
+    ]
+}
+"""
+
 class RecipeModifier:
-    def __init__(self):
-        # Use GPT-4 for sophisticated recipe analysis and modification
-        self.llm = ChatOpenAI(
-            model="gpt-4",
-            temperature=0.3,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
+    # Clients are looked up on first use, so a modifier that only ever takes the cached or manual paths never builds them.
+    # Use GPT-4o for sophisticated recipe analysis and modification (it also gets automatic prompt caching).
+    # self.llm answers in JSON text for streaming and batches; the structured clients return validated schemas.
+    @cached_property
+    def llm(self):
+        return get_chat_model("gpt-4o", temperature=0.3, max_tokens=_MODIFICATION_MAX_TOKENS, json_mode=True,
+                              timeout=GENERATION_TIMEOUT)
+
+    @cached_property
+    def modification_llm(self):
+        return get_structured_model(
+            RecipeModificationDraft, "gpt-4o", temperature=0.3, max_tokens=_MODIFICATION_MAX_TOKENS,
+            timeout=GENERATION_TIMEOUT
+        )
+
+    # Substitution lookup is a small structured task, so it runs on the faster model.
+    # Output that fails schema validation is retried on GPT-4o.
+    @cached_property
+    def ingredient_llm(self):
+        return get_structured_model(
+            SubstitutionSuggestions, "gpt-4o-mini", temperature=0.1, max_tokens=_SUBSTITUTION_MAX_TOKENS
         )
-        self.ingredient_llm = ChatOpenAI(
-            model="gpt-4",
-            temperature=0.1,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
+
+    @cached_property
+    def substitution_retry_llm(self):
+        return get_structured_model(
+            SubstitutionSuggestions, "gpt-4o", temperature=0.3, max_tokens=_SUBSTITUTION_MAX_TOKENS
         )
 
     def modify_recipe(self, recipe: OptimizedRecipe, modification_request: Dict[str, Any]) -> RecipeModificationResponse:
@@ -29,34 +190,288 @@ class RecipeModifier:
         Main method to modify a recipe based on available ingredients, serving size, and preferences.
         All substitutions and modifications are suggested by OpenAI, not a local database.
         """
-        available_ingredients = modification_request.get("available_ingredients", [])
+        available_ingredients = self._available_ingredients(modification_request)
         target_servings = modification_request.get("target_servings")
         dietary_preferences = modification_request.get("dietary_preferences", [])
         substitution_preferences = modification_request.get("substitution_preferences", {})
 
-        # Step 1: Ask OpenAI for missing ingredients and substitutions
-        substitutions = self._find_substitutions_openai(
-            recipe.ingredients,
-            available_ingredients,
-            dietary_preferences,
-            substitution_preferences
-        )
+        cache_key = self._create_cache_key(recipe, modification_request)
+        cached = _modification_cache.get(cache_key)
+        if cached is not None:
+            return cached.model_copy(deep=True)
 
-        # Step 2: Scale recipe if serving size changed
-        scaling_factor = None
-        if target_servings and recipe.servings:
-            scaling_factor = target_servings / recipe.servings
+        # Step 1: Scale recipe if serving size changed
+        scaling_factor = self._get_scaling_factor(recipe, target_servings)
 
-        # Step 3: Generate modified recipe using OpenAI
-        modified_recipe = self._generate_modified_recipe(
-            recipe,
-            substitutions,
-            scaling_factor,
-            dietary_preferences,
-            available_ingredients
+        # Step 2: Ask OpenAI for the substitutions and the modified recipe in one call
+        prompt = self._create_unified_prompt(
+            recipe, available_ingredients, scaling_factor, dietary_preferences, substitution_preferences
         )
+        draft = self._structured_result(self.modification_llm.invoke, prompt, "modify_recipe")
+        if draft is not None:
+            substitutions, modified_recipe = self._unpack_draft(draft)
+        else:
+            # Step 3: Fall back to a separate substitution lookup and a local rewrite of the recipe
+            substitutions = self._find_substitutions_openai(
+                recipe.ingredients,
+                available_ingredients,
+                dietary_preferences,
+                substitution_preferences
+            )
+            modified_recipe = self._manual_recipe_modification(recipe, substitutions, scaling_factor)
 
         # Step 4: Create response
+        result = self._build_modification_response(
+            recipe, modified_recipe, substitutions, scaling_factor, dietary_preferences, target_servings
+        )
+        _modification_cache.set(cache_key, result.model_copy(deep=True))
+        return result
+
+    async def amodify_recipe(self, recipe: OptimizedRecipe, modification_request: Dict[str, Any]) -> RecipeModificationResponse:
+        """
+        Async twin of modify_recipe. Uses ainvoke so the event loop is free while OpenAI generates.
+        """
+        available_ingredients = self._available_ingredients(modification_request)
+        target_servings = modification_request.get("target_servings")
+        dietary_preferences = modification_request.get("dietary_preferences", [])
+        substitution_preferences = modification_request.get("substitution_preferences", {})
+
+        cache_key = self._create_cache_key(recipe, modification_request)
+        cached = await _modification_cache.aget(cache_key)
+        if cached is not None:
+            return cached.model_copy(deep=True)
+
+        scaling_factor = self._get_scaling_factor(recipe, target_servings)
+        prompt = self._create_unified_prompt(
+            recipe, available_ingredients, scaling_factor, dietary_preferences, substitution_preferences
+        )
+        draft = await self._astructured_result(self.modification_llm.ainvoke, prompt, "amodify_recipe")
+        if draft is not None:
+            substitutions, modified_recipe = self._unpack_draft(draft)
+        else:
+            substitutions = await self._afind_substitutions_openai(
+                recipe.ingredients,
+                available_ingredients,
+                dietary_preferences,
+                substitution_preferences
+            )
+            modified_recipe = self._manual_recipe_modification(recipe, substitutions, scaling_factor)
+
+        result = self._build_modification_response(
+            recipe, modified_recipe, substitutions, scaling_factor, dietary_preferences, target_servings
+        )
+        await _modification_cache.aset(cache_key, result.model_copy(deep=True))
+        return result
+
+    async def astream_modified_recipe(self, recipe: OptimizedRecipe,
+                                      modification_request: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a modification as events. Each substitution, ingredient, prep step and cook step is
+        yielded as soon as the model finishes writing it; a final "result" event carries the full response.
+        """
+        available_ingredients = self._available_ingredients(modification_request)
+        target_servings = modification_request.get("target_servings")
+        dietary_preferences = modification_request.get("dietary_preferences", [])
+        substitution_preferences = modification_request.get("substitution_preferences", {})
+
+        cache_key = self._create_cache_key(recipe, modification_request)
+        result = await _modification_cache.aget(cache_key)
+        if result is None:
+            scaling_factor = self._get_scaling_factor(recipe, target_servings)
+            prompt = self._create_unified_prompt(
+                recipe, available_ingredients, scaling_factor, dietary_preferences, substitution_preferences
+            )
+
+            stream = JsonArrayItemStream(_STREAMED_ITEMS)
+            async for chunk in self.llm.astream(prompt, config=llm_config("RecipeModifier", "astream_modified_recipe")):
+                for key, item in stream.feed(chunk.content):
+                    event_type, schema = _STREAMED_ITEMS[key]
+                    try:
+                        yield {"type": event_type, "data": schema(**item).model_dump()}
+                    except _SUBSTITUTION_PARSE_ERRORS:
+                        continue
+
+            try:
+                substitutions, modified_recipe = self._parse_unified_response(stream.buffer)
+            except _SUBSTITUTION_PARSE_ERRORS:
+                substitutions = await self._afind_substitutions_openai(
+                    recipe.ingredients,
+                    available_ingredients,
+                    dietary_preferences,
+                    substitution_preferences
+                )
+                modified_recipe = self._manual_recipe_modification(recipe, substitutions, scaling_factor)
+
+            result = self._build_modification_response(
+                recipe, modified_recipe, substitutions, scaling_factor, dietary_preferences, target_servings
+            )
+            await _modification_cache.aset(cache_key, result.model_copy(deep=True))
+
+        yield {"type": "result", "data": result.model_dump()}
+
+    def modify_recipe_batch(self, recipe: OptimizedRecipe,
+                            modification_requests: List[Dict[str, Any]]) -> List[RecipeModificationResponse]:
+        """
+        Apply several modification requests (e.g. one per dietary preference or serving count) to the same
+        recipe. Cached results are reused and the rest go to OpenAI a few at a time, one call per group.
+        Requests a batched call fails or doesn't cover fall back to modify_recipe.
+        """
+        responses: List[Optional[RecipeModificationResponse]] = []
+        misses = []
+        for index, request in enumerate(modification_requests):
+            cached = _modification_cache.get(self._create_cache_key(recipe, request))
+            responses.append(cached.model_copy(deep=True) if cached is not None else None)
+            if cached is None:
+                misses.append(index)
+
+        for start in range(0, len(misses), _BATCH_MAX_REQUESTS):
+            group = misses[start:start + _BATCH_MAX_REQUESTS]
+            if len(group) > 1:
+                results = self._modify_recipe_group(recipe, [modification_requests[index] for index in group])
+                for index, result in zip(group, results):
+                    responses[index] = result
+
+        return [response if response is not None else self.modify_recipe(recipe, request)
+                for request, response in zip(modification_requests, responses)]
+
+    def _modify_recipe_group(self, recipe: OptimizedRecipe,
+                             modification_requests: List[Dict[str, Any]]) -> List[Optional[RecipeModificationResponse]]:
+        """One OpenAI call for a group of requests; None for each request the response doesn't cover"""
+        prompt = self._create_batch_modification_prompt(recipe, modification_requests)
+        # Each request gets its own modified recipe, so the output cap and the timeout grow with the group
+        batch_llm = get_chat_model("gpt-4o", temperature=0.3, json_mode=True,
+                                   max_tokens=_MODIFICATION_MAX_TOKENS * len(modification_requests),
+                                   timeout=GENERATION_TIMEOUT * len(modification_requests))
+        try:
+            response = batch_llm.invoke(prompt, config=llm_config("RecipeModifier", "modify_recipe_batch"))
+            results = json.loads(response.content)["results"]
+        except (APITimeoutError, TimeoutError, LengthFinishReasonError, BadRequestError, *_SUBSTITUTION_PARSE_ERRORS):
+            return [None] * len(modification_requests)
+
+        responses = []
+        for index, request in enumerate(modification_requests):
+            target_servings = request.get("target_servings")
+            dietary_preferences = request.get("dietary_preferences", [])
+            try:
+                item = results[index]
+                substitutions = [IngredientSubstitution(**sub) for sub in item.get("substitutions", [])]
+                modified_recipe = self._parse_modified_recipe(item["modified_recipe"])
+            except (IndexError, *_SUBSTITUTION_PARSE_ERRORS):
+                responses.append(None)
+                continue
+
+            result = self._build_modification_response(
+                recipe, modified_recipe, substitutions,
+                self._get_scaling_factor(recipe, target_servings), dietary_preferences, target_servings
+            )
+            _modification_cache.set(self._create_cache_key(recipe, request), result.model_copy(deep=True))
+            responses.append(result)
+        return responses
+
+    def _create_batch_modification_prompt(self, recipe: OptimizedRecipe,
+                                          modification_requests: List[Dict[str, Any]]) -> List[BaseMessage]:
+        """
+        Create the messages covering every modification request, answered as an array in request order.
+        """
+        request_blocks = []
+        all_dietary_preferences = []
+        for number, request in enumerate(modification_requests, 1):
+            dietary_preferences = request.get("dietary_preferences", [])
+            all_dietary_preferences.extend(p for p in dietary_preferences if p not in all_dietary_preferences)
+            scaling_factor = self._get_scaling_factor(recipe, request.get("target_servings"))
+            available = ", ".join(
+                self._describe_ingredient(ing) for ing in request.get("available_ingredients") or []
+            ) or "Any"
+            user_prefs = ", ".join(
+                f"{k}: {v}" for k, v in (request.get("substitution_preferences") or {}).items()
+            ) or "None"
+            scaling_text = (f"{recipe.servings} -> {int(recipe.servings * scaling_factor)} servings"
+                            if scaling_factor else "Keep original serving size")
+            request_blocks.append(f"""REQUEST {number}:
+- Serving Size: {scaling_text}
+- Dietary Preferences: {', '.join(dietary_preferences) if dietary_preferences else 'None'}
+- Available Ingredients (name|amount|unit): {available}
+- User Substitution Preferences: {user_prefs}""")
+        requests_text = "\n\n".join(request_blocks)
+
+        return [
+            SystemMessage(content=_BATCH_MODIFICATION_SYSTEM_PROMPT),
+            HumanMessage(content=f"""ORIGINAL RECIPE:
+Title: {recipe.title}
+Servings: {recipe.servings}
+Ingredients (name|amount|unit|notes):
+{self._format_ingredient_lines(recipe.ingredients)}
+Prep Phase: {self._compact_json(recipe.prep_phase)}
+Cook Phase: {self._compact_json(recipe.cook_phase)}
+
+{requests_text}
+
+CRITICAL DIETARY RESTRICTIONS (apply only to the requests that ask for them):
+{self._get_dietary_restrictions_instructions(all_dietary_preferences)}
+"""),
+        ]
+
+    def _available_ingredients(self, modification_request: Dict[str, Any]) -> List[AvailableIngredient]:
+        """The request's available ingredients as models; callers may pass model_dump() dicts"""
+        return [
+            AvailableIngredient(**ing) if isinstance(ing, dict) else ing
+            for ing in modification_request.get("available_ingredients") or []
+        ]
+
+    def _create_cache_key(self, recipe: OptimizedRecipe, modification_request: Dict[str, Any]) -> str:
+        """
+        Normalize a modification request into a cache key. Ingredient and preference order
+        is ignored and the scaling factor is rounded, so equivalent requests share an entry.
+        """
+        scaling_factor = self._get_scaling_factor(recipe, modification_request.get("target_servings"))
+        substitution_preferences = modification_request.get("substitution_preferences") or {}
+        return json.dumps({
+            "title": recipe.title,
+            "servings": recipe.servings,
+            "ingredients": sorted(self._describe_ingredient(ing) for ing in recipe.ingredients),
+            "prep_phase": [step.instruction for step in recipe.prep_phase],
+            "cook_phase": [step.instruction for step in recipe.cook_phase],
+            "available_ingredients": sorted(
+                self._describe_ingredient(ing) for ing in modification_request.get("available_ingredients") or []
+            ),
+            "scaling_factor": round(scaling_factor, 2) if scaling_factor else None,
+            "dietary_preferences": sorted(pref.lower() for pref in modification_request.get("dietary_preferences") or []),
+            "substitution_preferences": sorted(f"{k}:{v}".lower() for k, v in substitution_preferences.items()),
+        }, sort_keys=True)
+
+    def _create_substitution_cache_key(self, recipe_ingredients: List[Ingredient],
+                                       available_ingredients: List[AvailableIngredient],
+                                       dietary_preferences: List[str],
+                                       substitution_preferences: Dict[str, str]) -> str:
+        """Normalize a substitution lookup into a cache key, ignoring ingredient and preference order"""
+        return json.dumps({
+            "ingredients": sorted(self._describe_ingredient(ing) for ing in recipe_ingredients),
+            "available_ingredients": sorted(self._describe_ingredient(ing) for ing in available_ingredients or []),
+            "dietary_preferences": sorted(pref.lower() for pref in dietary_preferences or []),
+            "substitution_preferences": sorted(f"{k}:{v}".lower() for k, v in (substitution_preferences or {}).items()),
+        }, sort_keys=True)
+
+    def _describe_ingredient(self, ingredient) -> str:
+        """Lowercased name|amount|unit for an ingredient model or dict"""
+        if isinstance(ingredient, dict):
+            fields = (ingredient.get("name"), ingredient.get("amount"), ingredient.get("unit"))
+        else:
+            fields = (ingredient.name, ingredient.amount, ingredient.unit)
+        return "|".join(str(field or "") for field in fields).lower()
+
+    def _get_scaling_factor(self, recipe: OptimizedRecipe, target_servings: Optional[int]) -> Optional[float]:
+        """Scaling factor between the recipe's servings and the requested servings"""
+        if target_servings and recipe.servings:
+            return target_servings / recipe.servings
+        return None
+
+    def _build_modification_response(self, recipe: OptimizedRecipe,
+                                     modified_recipe: OptimizedRecipe,
+                                     substitutions: List[IngredientSubstitution],
+                                     scaling_factor: Optional[float],
+                                     dietary_preferences: List[str],
+                                     target_servings: Optional[int]) -> RecipeModificationResponse:
+        """Assemble the API response from the modification results"""
         return RecipeModificationResponse(
             modified_recipe=modified_recipe,
             substitutions_made=substitutions,
@@ -73,22 +488,75 @@ class RecipeModifier:
         """
         Use OpenAI to suggest substitutions for missing ingredients.
         """
+        cache_key = self._create_substitution_cache_key(
+            recipe_ingredients, available_ingredients, dietary_preferences, substitution_preferences
+        )
+        cached = _substitution_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
         prompt = self._create_substitution_prompt(
             recipe_ingredients,
             available_ingredients,
             dietary_preferences,
             substitution_preferences
         )
-        response = self.ingredient_llm.invoke(prompt)
-        try:
-            data = json.loads(response.content)
-            return [IngredientSubstitution(**sub) for sub in data.get("substitutions", [])]
-        except Exception:
+        suggestions = (self._structured_result(self.ingredient_llm.invoke, prompt, "find_substitutions")
+                       or self._structured_result(self.substitution_retry_llm.invoke, prompt, "find_substitutions_retry"))
+        # The modification step works without substitutions, don't let a slow or invalid lookup block it
+        if suggestions is None:
             return []
+        _substitution_cache.set(cache_key, tuple(suggestions.substitutions))
+        return list(suggestions.substitutions)
 
-    def _create_substitution_prompt(self, recipe_ingredients, available_ingredients, dietary_preferences, substitution_preferences):
+    async def _afind_substitutions_openai(self, recipe_ingredients: List[Ingredient],
+                                          available_ingredients: List[AvailableIngredient],
+                                          dietary_preferences: List[str],
+                                          substitution_preferences: Dict[str, str]) -> List[IngredientSubstitution]:
         """
-        Create a prompt for OpenAI to suggest ingredient substitutions.
+        Async twin of _find_substitutions_openai.
+        """
+        cache_key = self._create_substitution_cache_key(
+            recipe_ingredients, available_ingredients, dietary_preferences, substitution_preferences
+        )
+        cached = await _substitution_cache.aget(cache_key)
+        if cached is not None:
+            return list(cached)
+        
+        prompt = self._create_substitution_prompt(
+            recipe_ingredients,
+            available_ingredients,
+            dietary_preferences,
+            substitution_preferences
+        )
+        suggestions = (await self._astructured_result(self.ingredient_llm.ainvoke, prompt, "afind_substitutions")
+                       or await self._astructured_result(self.substitution_retry_llm.ainvoke, prompt, "afind_substitutions_retry"))
+        if suggestions is None:
+            return []
+        await _substitution_cache.aset(cache_key, tuple(suggestions.substitutions))
+        return list(suggestions.substitutions)
+
+    def _structured_result(self, invoke: Callable, prompt: List[BaseMessage], method: str):
+        """Call a structured-output client, returning the parsed schema or None if it timed out or didn't validate"""
+        try:
+            return invoke(prompt, config=llm_config("RecipeModifier", method))["parsed"]
+        except (APITimeoutError, TimeoutError, LengthFinishReasonError):
+            return None
+
+    async def _astructured_result(self, ainvoke: Callable, prompt: List[BaseMessage], method: str):
+        """Async twin of _structured_result"""
+        try:
+            return (await ainvoke(prompt, config=llm_config("RecipeModifier", method)))["parsed"]
+        except (APITimeoutError, TimeoutError, LengthFinishReasonError):
+            return None
+
+    def _unpack_draft(self, draft: RecipeModificationDraft) -> Tuple[List[IngredientSubstitution], OptimizedRecipe]:
+        """Split a structured modification into substitutions and the recipe (which isn't saved yet, so has no id)"""
+        return draft.substitutions, draft.modified_recipe.model_copy(update={"recipe_id": None})
+
+    def _create_substitution_prompt(self, recipe_ingredients, available_ingredients, dietary_preferences, substitution_preferences) -> List[BaseMessage]:
+        """
+        Create the messages asking OpenAI to suggest ingredient substitutions.
         """
         recipe_ings = "\n".join([f"- {ing.name} ({ing.amount or ''} {ing.unit or ''})" for ing in recipe_ingredients])
         available_ings = "\n".join([f"- {ing.name} ({ing.amount or ''} {ing.unit or ''})" for ing in available_ingredients])
@@ -98,141 +566,83 @@ class RecipeModifier:
         # Determine if we need to replace ingredients for dietary restrictions
         dietary_instruction = ""
         if dietary_preferences:
-            dietary_instruction = f"""
-IMPORTANT: This recipe needs to be modified for the following dietary restrictions: {dietary}
-- For VEGAN: Replace ALL animal products (meat, dairy, eggs, honey, etc.) with plant-based alternatives
-- For VEGETARIAN: Replace ALL meat products with vegetarian alternatives
-- For GLUTEN-FREE: Replace ALL gluten-containing ingredients (wheat flour, breadcrumbs, etc.)
-- For DAIRY-FREE: Replace ALL dairy products (milk, cheese, butter, cream, etc.)
+            dietary_instruction = f"\nIMPORTANT: This recipe needs to be modified for the following dietary restrictions: {dietary}\n"
 
-You MUST suggest substitutions for ALL ingredients that violate the dietary restrictions, not just missing ingredients.
-"""
-
-        return f"""
-You are a culinary expert. Given the following recipe ingredients, suggest substitutions to make this recipe compliant with dietary restrictions.
-- Recipe Ingredients:
+        return [
+            SystemMessage(content=_SUBSTITUTION_SYSTEM_PROMPT),
+            HumanMessage(content=f"""- Recipe Ingredients:
 {recipe_ings}
 - Available Ingredients:
 {available_ings}
 - Dietary Preferences: {dietary}
 - User Substitution Preferences:
 {user_prefs}
-{dietary_instruction}
-
-For each ingredient that needs substitution (either missing or violating dietary restrictions), suggest appropriate alternatives.
-Return a JSON list in this format:
-{{
-  "substitutions": [
-    {{
-      "original_name": "string",
-      "original_amount": "string",
-      "original_unit": "string",
-      "substitute_name": "string",
-      "substitute_amount": "string",
-      "substitute_unit": "string",
-      "substitution_reason": "string",
-      "substitution_notes": "string"
-    }}
-  ]
-}}
-"""
-
-    def _generate_modified_recipe(self, original_recipe: OptimizedRecipe,
-                                  substitutions: List[IngredientSubstitution],
-                                  scaling_factor: Optional[float],
-                                  dietary_preferences: List[str],
-                                  available_ingredients: List[AvailableIngredient]) -> OptimizedRecipe:
-        """
-        Use OpenAI to generate a modified recipe.
-        """
-        substitution_map = {sub.original_name: sub for sub in substitutions}
-        prompt = self._create_modification_prompt(
-            original_recipe, substitution_map, scaling_factor, dietary_preferences, available_ingredients
-        )
-        response = self.llm.invoke(prompt)
-        try:
-            modified_data = json.loads(response.content)
-            return self._parse_modified_recipe(modified_data)
-        except Exception:
-            return self._manual_recipe_modification(original_recipe, substitutions, scaling_factor)
-
-    def _create_modification_prompt(self, recipe: OptimizedRecipe,
-                                    substitution_map: Dict[str, IngredientSubstitution],
-                                    scaling_factor: Optional[float],
-                                    dietary_preferences: List[str],
-                                    available_ingredients: List[AvailableIngredient]) -> str:
+{dietary_instruction}"""),
+        ]
+
+    def _parse_unified_response(self, content: str) -> Tuple[List[IngredientSubstitution], OptimizedRecipe]:
+        """Parse streamed substitutions + modified recipe JSON, raising if it doesn't match the schema"""
+        data = json.loads(content)
+        substitutions = [IngredientSubstitution(**sub) for sub in data.get("substitutions", [])]
+        return substitutions, self._parse_modified_recipe(data["modified_recipe"])
+
+    def _create_unified_prompt(self, recipe: OptimizedRecipe,
+                               available_ingredients: List[AvailableIngredient],
+                               scaling_factor: Optional[float],
+                               dietary_preferences: List[str],
+                               substitution_preferences: Dict[str, str]) -> List[BaseMessage]:
         """
-        Create prompt for AI recipe modification.
+        Create the messages asking OpenAI for the substitutions and the modified recipe together.
         """
-        substitutions_text = "\n".join([
-            f"- {sub.original_name} ({sub.original_amount} {sub.original_unit}) -> {sub.substitute_name} ({sub.substitute_amount} {sub.substitute_unit}) - {sub.substitution_reason}"
-            for sub in substitution_map.values()
-        ])
         available_text = "\n".join([
             f"- {ing.name} ({ing.amount} {ing.unit})" if ing.amount and ing.unit
             else f"- {ing.name}" for ing in available_ingredients
-        ])
+        ]) or "Any"
+        user_prefs = "\n".join([f"- {k}: {v}" for k, v in substitution_preferences.items()]) if substitution_preferences else "None"
         scaling_text = f"Scale recipe from {recipe.servings} servings to {int(recipe.servings * scaling_factor)} servings" if scaling_factor else "Keep original serving size"
 
-        return f"""
-You are a professional chef and recipe modification expert. Modify this recipe based on the available ingredients and requirements.
-
-ORIGINAL RECIPE:
+        return [
+            SystemMessage(content=_MODIFICATION_SYSTEM_PROMPT),
+            HumanMessage(content=f"""ORIGINAL RECIPE:
 Title: {recipe.title}
 Servings: {recipe.servings}
-Ingredients: {json.dumps([ing.dict() for ing in recipe.ingredients], indent=2)}
-Prep Phase: {json.dumps([step.dict() for step in recipe.prep_phase], indent=2)}
-Cook Phase: {json.dumps([step.dict() for step in recipe.cook_phase], indent=2)}
+Ingredients (name|amount|unit|notes):
+{self._format_ingredient_lines(recipe.ingredients)}
+Prep Phase: {self._compact_json(recipe.prep_phase)}
+Cook Phase: {self._compact_json(recipe.cook_phase)}
 
 MODIFICATIONS REQUIRED:
-1. Ingredient Substitutions:
-{substitutions_text}
-
-2. Available Ingredients:
+1. Available Ingredients:
 {available_text}
 
+2. User Substitution Preferences:
+{user_prefs}
+
 3. Serving Size: {scaling_text}
 
 4. Dietary Preferences: {', '.join(dietary_preferences) if dietary_preferences else 'None'}
 
 CRITICAL DIETARY RESTRICTIONS:
 {self._get_dietary_restrictions_instructions(dietary_preferences)}
+"""),
+        ]
+
+    def _format_ingredient_lines(self, ingredients: List[Ingredient]) -> str:
+        """Render ingredients as compact name|amount|unit|notes lines, far fewer tokens than JSON"""
+        return "\n".join(
+            "|".join([ing.name, ing.amount or "", ing.unit or "", ing.notes or ""]).rstrip("|")
+            for ing in ingredients
+        )
 
-INSTRUCTIONS:
-1. Apply all ingredient substitutions listed above
-2. Adjust cooking instructions to work with substituted ingredients
-3. Scale all ingredient amounts proportionally if serving size changes
-4. Modify prep and cooking steps to accommodate substitutions
-5. Ensure the recipe maintains its core flavor profile and cooking method
-6. Update timing estimates if needed
-7. Add notes about any significant changes
-8. CRITICAL: Ensure ALL ingredients comply with dietary restrictions - NO EXCEPTIONS
-
-Return the modified recipe in this exact JSON format:
-{{
-    "title": "Modified Recipe Title",
-    "ingredients": [
-        {{"name": "ingredient name", "amount": "quantity", "unit": "unit", "notes": "prep notes"}}
-    ],
-    "prep_phase": [
-        {{"instruction": "prep task", "time_estimate": minutes, "category": "chopping/measuring/preheating/etc"}}
-    ],
-    "cook_phase": [
-        {{"step_number": 1, "instruction": "cooking step", "time_estimate": minutes, "parallel_tasks": ["task1", "task2"]}}
-    ],
-    "total_time": total_minutes,
-    "prep_time": prep_minutes,
-    "cook_time": cook_minutes,
-    "servings": number_of_servings,
-    "difficulty": "easy/medium/hard"
-}}
-"""
+    def _compact_json(self, steps) -> str:
+        """Dump steps without whitespace or empty fields to keep the prompt small"""
+        return json.dumps([step.model_dump(exclude_none=True) for step in steps], separators=(',', ':'))
 
     def _parse_modified_recipe(self, data: dict) -> OptimizedRecipe:
         """Parse AI response into OptimizedRecipe object"""
-        ingredients = [Ingredient(**ing) for ing in data.get('ingredients', [])]
-        prep_steps = [PrepStep(**step) for step in data.get('prep_phase', [])]
-        cook_steps = [CookStep(**step) for step in data.get('cook_phase', [])]
+        ingredients = INGREDIENTS_ADAPTER.validate_python(data.get('ingredients', []))
+        prep_steps = PREP_STEPS_ADAPTER.validate_python(data.get('prep_phase', []))
+        cook_steps = COOK_STEPS_ADAPTER.validate_python(data.get('cook_phase', []))
 
         return OptimizedRecipe(
             title=data.get('title', 'Modified Recipe'),
@@ -264,44 +674,31 @@ Return the modified recipe in this exact JSON format:
                     notes=f"Substituted for {ingredient.name}"
                 ))
             else:
-                if scaling_factor and ingredient.amount:
-                    try:
-                        amount = float(re.findall(r'\d+\.?\d*', ingredient.amount)[0])
-                        scaled_amount = amount * scaling_factor
-                        modified_ingredients.append(Ingredient(
-                            name=ingredient.name,
-                            amount=str(scaled_amount),
-                            unit=ingredient.unit,
-                            notes=ingredient.notes
-                        ))
-                    except:
-                        modified_ingredients.append(ingredient)
+                if scaling_factor and ingredient.numeric_amount is not None:
+                    modified_ingredients.append(Ingredient(
+                        name=ingredient.name,
+                        amount=str(ingredient.numeric_amount * scaling_factor),
+                        unit=ingredient.unit,
+                        notes=ingredient.notes
+                    ))
                 else:
                     modified_ingredients.append(ingredient)
 
+        replace_names = self._build_name_replacer(substitutions)
+
         modified_prep_steps = []
         for step in original_recipe.prep_phase:
-            modified_instruction = step.instruction
-            for sub in substitutions:
-                modified_instruction = modified_instruction.replace(
-                    sub.original_name, sub.substitute_name
-                )
             modified_prep_steps.append(PrepStep(
-                instruction=modified_instruction,
+                instruction=replace_names(step.instruction),
                 time_estimate=step.time_estimate,
                 category=step.category
             ))
 
         modified_cook_steps = []
         for step in original_recipe.cook_phase:
-            modified_instruction = step.instruction
-            for sub in substitutions:
-                modified_instruction = modified_instruction.replace(
-                    sub.original_name, sub.substitute_name
-                )
             modified_cook_steps.append(CookStep(
                 step_number=step.step_number,
-                instruction=modified_instruction,
+                instruction=replace_names(step.instruction),
                 time_estimate=step.time_estimate,
                 parallel_tasks=step.parallel_tasks
             ))
@@ -320,6 +717,20 @@ Return the modified recipe in this exact JSON format:
             difficulty=original_recipe.difficulty
         )
 
+    def _build_name_replacer(self, substitutions: List[IngredientSubstitution]) -> Callable[[str], str]:
+        """
+        Build a function that swaps every substituted ingredient name in a single pass
+        over one compiled alternation, instead of a str.replace per substitution.
+        Longer names are tried first so the longest match wins at each position
+        ("chicken breast" over "chicken"), like an Aho-Corasick leftmost-longest scan.
+        """
+        name_map = {sub.original_name: sub.substitute_name for sub in substitutions if sub.original_name}
+        if not name_map:
+            return lambda text: text
+        names = sorted(name_map, key=len, reverse=True)
+        name_pattern = re.compile("|".join(re.escape(name) for name in names))
+        return lambda text: name_pattern.sub(lambda match: name_map[match.group(0)], text)
+
     def _generate_modification_notes(self, substitutions: List[IngredientSubstitution],
                                      scaling_factor: Optional[float],
                                      dietary_preferences: List[str]) -> str:
@@ -377,14 +788,15 @@ DAIRY-FREE RESTRICTIONS:
         
         return "\n".join(instructions) if instructions else "No dietary restrictions."
 
-    def adjust_recipe_for_dietary_needs(self, recipe: OptimizedRecipe, dietary_preference: str, servings: int = None) -> Dict[str, Any]:
+    def adjust_recipe_for_dietary_needs(self, recipe: OptimizedRecipe, dietary_preference: Optional[str], servings: int = None) -> Dict[str, Any]:
         """
         Legacy method for backward compatibility - now uses the main modify_recipe method
         """
         modification_request = {
             "available_ingredients": [],
             "target_servings": servings,
-            "dietary_preferences": [dietary_preference],
+            # Serving-only adjustments pass no preference
+            "dietary_preferences": [dietary_preference] if dietary_preference else [],
             "substitution_preferences": {}
         }
         result = self.modify_recipe(recipe, modification_request)
@@ -1,75 +1,29 @@
-from langchain_openai import ChatOpenAI
 from backend.app.schemas.schemas import OptimizedRecipe, Ingredient, PrepStep, CookStep
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
+from typing import List, Tuple
+from .response_cache import ResponseCache
+from ._llm import GENERATION_TIMEOUT, get_structured_model, llm_config
+from openai import APITimeoutError, LengthFinishReasonError
 import json
-import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-class RecipeOptimizer:
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4",
-            temperature=0.1,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-    
-    def optimize_recipe(self, scraped_data: dict) -> OptimizedRecipe:
-        """
-        Transform a scraped recipe into an optimized prep-first workflow for Prep Pad
-        """
-        # Create the optimization prompt
-        prompt = self._create_optimization_prompt(scraped_data)
-        
-        # Get AI response
-        response = self.llm.invoke(prompt)
-        
-        # Parse the response into structured data
-        try:
-            optimized_data = json.loads(response.content)
-            return self._parse_optimized_recipe(optimized_data)
-        except json.JSONDecodeError:
-            # Fallback parsing if JSON parsing fails
-            return self._fallback_parse(response.content, scraped_data)
-    
-    def _create_optimization_prompt(self, scraped_data: dict) -> str:
-        """Create the prompt for recipe optimization"""
-        return f"""
-You are a professional chef and cooking workflow expert. Your task is to transform this recipe into a "mise-en-place" (everything in its place) optimized workflow.
+_optimization_cache = ResponseCache()
 
-Original Recipe:
-Title: {scraped_data.get('title', 'Untitled')}
-Ingredients: {json.dumps(scraped_data.get('ingredients', []), indent=2)}
-Instructions: {json.dumps(scraped_data.get('instructions', []), indent=2)}
-Servings: {scraped_data.get('servings', 'unknown')}
+# Static system prompt, identical across calls so OpenAI can reuse the cached prefix.
+# The response shape is enforced by structured output, so it isn't spelled out here.
+_OPTIMIZATION_SYSTEM_PROMPT = """
+You are a professional chef and cooking workflow expert. Your task is to transform the recipe you are given into a "mise-en-place" (everything in its place) optimized workflow.
 
 Your job is to:
 1. Parse and clean the ingredients list
 2. Adjust ingredient quantities and instructions if the ingredients or serving size have changed
 3. Create a "Prep Phase" with all preparation tasks that can be done ahead of time
 4. Create a "Cook Phase" with optimized cooking steps that can be done in parallel where possible
-5. Estimate timing for each step
+5. Estimate timing for each step, in minutes
 6. Identify parallel tasks
 
-Return your response as a JSON object with this exact structure:
-{{
-    "title": "Recipe Title",
-    "ingredients": [
-        {{"name": "ingredient name", "amount": "quantity", "unit": "unit", "notes": "prep notes"}}
-    ],
-    "prep_phase": [
-        {{"instruction": "prep task", "time_estimate": minutes, "category": "chopping/measuring/preheating/etc"}}
-    ],
-    "cook_phase": [
-        {{"step_number": 1, "instruction": "cooking step", "time_estimate": minutes, "parallel_tasks": ["task1", "task2"]}}
-    ],
-    "total_time": total_minutes,
-    "prep_time": prep_minutes,
-    "cook_time": cook_minutes,
-    "servings": number_of_servings,
-    "difficulty": "easy/medium/hard"
-}}
-
 Guidelines:
 - Group prep tasks by type (chopping, measuring, preheating)
 - Identify what can be done in parallel during cooking
@@ -77,28 +31,86 @@ Guidelines:
 - Make instructions clear and actionable
 - Consider mise-en-place principles (prep everything before cooking)
 - If the ingredients or serving size have changed, update the recipe accordingly
+- Difficulty is one of easy, medium or hard
 """
+
+class RecipeOptimizer:
+    def __init__(self):
+        # Structured output validates the response against OptimizedRecipe; the cap bounds decode time
+        # and temperature 0 keeps parses of the same page repeatable
+        self.llm = get_structured_model(OptimizedRecipe, "gpt-4o", temperature=0, max_tokens=2048,
+                                        timeout=GENERATION_TIMEOUT)
     
-    def _parse_optimized_recipe(self, data: dict) -> OptimizedRecipe:
-        """Parse the AI response into OptimizedRecipe object"""
-        ingredients = [Ingredient(**ing) for ing in data.get('ingredients', [])]
-        prep_steps = [PrepStep(**step) for step in data.get('prep_phase', [])]
-        cook_steps = [CookStep(**step) for step in data.get('cook_phase', [])]
+    def optimize_recipe(self, scraped_data: dict) -> OptimizedRecipe:
+        """
+        Transform a scraped recipe into an optimized prep-first workflow for Prep Pad
+        """
+        cache_key, cache_text = self._create_cache_key(scraped_data)
+        cached = _optimization_cache.get(cache_key, cache_text)
+        if cached is not None:
+            return cached.model_copy(deep=True)
         
-        return OptimizedRecipe(
-            title=data.get('title', 'Optimized Recipe'),
-            ingredients=ingredients,
-            prep_phase=prep_steps,
-            cook_phase=cook_steps,
-            total_time=data.get('total_time'),
-            prep_time=data.get('prep_time'),
-            cook_time=data.get('cook_time'),
-            servings=data.get('servings'),
-            difficulty=data.get('difficulty')
-        )
+        # Create the optimization prompt
+        prompt = self._create_optimization_prompt(scraped_data)
+        
+        # Get AI response, already validated against OptimizedRecipe
+        try:
+            optimized_recipe = self.llm.invoke(prompt, config=llm_config("RecipeOptimizer", "optimize_recipe"))["parsed"]
+        except (APITimeoutError, TimeoutError, LengthFinishReasonError):
+            optimized_recipe = None
+        if optimized_recipe is None:
+            # Fallback parsing if the response timed out or didn't match the schema
+            return self._fallback_parse(scraped_data)
+        
+        _optimization_cache.set(cache_key, optimized_recipe.model_copy(deep=True), cache_text)
+        return optimized_recipe
+
+    async def aoptimize_recipe(self, scraped_data: dict) -> OptimizedRecipe:
+        """
+        Async twin of optimize_recipe. Uses ainvoke so the event loop is free while OpenAI generates.
+        """
+        cache_key, cache_text = self._create_cache_key(scraped_data)
+        cached = await _optimization_cache.aget(cache_key, cache_text)
+        if cached is not None:
+            return cached.model_copy(deep=True)
+        
+        prompt = self._create_optimization_prompt(scraped_data)
+        try:
+            optimized_recipe = (await self.llm.ainvoke(prompt, config=llm_config("RecipeOptimizer", "aoptimize_recipe")))["parsed"]
+        except (APITimeoutError, TimeoutError, LengthFinishReasonError):
+            optimized_recipe = None
+        if optimized_recipe is None:
+            return self._fallback_parse(scraped_data)
+        
+        await _optimization_cache.aset(cache_key, optimized_recipe.model_copy(deep=True), cache_text)
+        return optimized_recipe
+    
+    def _create_cache_key(self, scraped_data: dict) -> Tuple[str, str]:
+        """
+        Normalize scraped recipe data into a cache key and free text. The title, ingredients and
+        servings must match exactly; only the instruction wording may match semantically.
+        """
+        key = json.dumps({
+            "title": scraped_data.get('title', ''),
+            "ingredients": sorted(str(ing).strip().lower() for ing in scraped_data.get('ingredients', [])),
+            "servings": scraped_data.get('servings'),
+        }, sort_keys=True, default=str)
+        return key, "\n".join(str(step) for step in scraped_data.get('instructions', []))
+    
+    def _create_optimization_prompt(self, scraped_data: dict) -> List[BaseMessage]:
+        """Create the messages for recipe optimization"""
+        return [
+            SystemMessage(content=_OPTIMIZATION_SYSTEM_PROMPT),
+            HumanMessage(content=f"""Original Recipe:
+Title: {scraped_data.get('title', 'Untitled')}
+Ingredients: {json.dumps(scraped_data.get('ingredients', []), separators=(',', ':'))}
+Instructions: {json.dumps(scraped_data.get('instructions', []), separators=(',', ':'))}
+Servings: {scraped_data.get('servings', 'unknown')}
+"""),
+        ]
     
-    def _fallback_parse(self, content: str, scraped_data: dict) -> OptimizedRecipe:
-        """Fallback parsing if JSON parsing fails"""
+    def _fallback_parse(self, scraped_data: dict) -> OptimizedRecipe:
+        """Fallback parsing if the structured response fails validation"""
         # Simple fallback - create basic structure
         ingredients = [Ingredient(name=ing, amount="", unit="", notes="") 
                      for ing in scraped_data.get('ingredients', [])]
@@ -0,0 +1,117 @@
+from langchain_openai import OpenAIEmbeddings
+from collections import OrderedDict
+from typing import Any, Optional, List, Tuple
+import hashlib
+import math
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Cosine similarity needed for a semantic hit. Unset disables the semantic tier (exact matches only).
+SEMANTIC_CACHE_THRESHOLD = os.getenv("SEMANTIC_CACHE_THRESHOLD")
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses. The exact tier is a hash of the normalized key plus any
+    free text; the optional semantic tier only compares entries whose key matches exactly, and
+    returns the one whose free text embedding is closest above the similarity threshold. Keys
+    hold the structured fields (recipe, ingredient, scaling factor, preferences) so a near
+    miss never crosses them. Entries expire after ttl_seconds and the oldest entries are
+    evicted beyond maxsize. Safe to share between threadpool routes.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: int = 3600,
+                 similarity_threshold: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        if similarity_threshold is None and SEMANTIC_CACHE_THRESHOLD:
+            similarity_threshold = float(SEMANTIC_CACHE_THRESHOLD)
+        self.similarity_threshold = similarity_threshold
+        self.embeddings = None
+        if similarity_threshold is not None:
+            self.embeddings = OpenAIEmbeddings(
+                model="text-embedding-3-small",
+                openai_api_key=os.getenv("OPENAI_API_KEY")
+            )
+        # hash of key and text -> (expires_at, hash of key, text embedding, value)
+        self._entries: "OrderedDict[str, Tuple[float, str, Optional[List[float]], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, text: Optional[str] = None) -> Optional[Any]:
+        """Look up a cached value for the normalized key and optional free text"""
+        value = self._get_exact(self._hash(key, text))
+        if value is not None or not self._semantic(text):
+            return value
+        return self._get_similar(self._hash(key), self.embeddings.embed_query(text))
+
+    async def aget(self, key: str, text: Optional[str] = None) -> Optional[Any]:
+        """Async twin of get"""
+        value = self._get_exact(self._hash(key, text))
+        if value is not None or not self._semantic(text):
+            return value
+        return self._get_similar(self._hash(key), await self.embeddings.aembed_query(text))
+
+    def set(self, key: str, value: Any, text: Optional[str] = None) -> None:
+        """Store a value for the normalized key and optional free text"""
+        embedding = self.embeddings.embed_query(text) if self._semantic(text) else None
+        self._store(self._hash(key, text), self._hash(key), embedding, value)
+
+    async def aset(self, key: str, value: Any, text: Optional[str] = None) -> None:
+        """Async twin of set"""
+        embedding = await self.embeddings.aembed_query(text) if self._semantic(text) else None
+        self._store(self._hash(key, text), self._hash(key), embedding, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _semantic(self, text: Optional[str]) -> bool:
+        return self.embeddings is not None and bool(text)
+
+    def _hash(self, key: str, text: Optional[str] = None) -> str:
+        if text is not None:
+            key = f"{key}\0{text}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _get_exact(self, digest: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            expires_at, _, _, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return value
+
+    def _get_similar(self, scope: str, embedding: List[float]) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                (cached_embedding, value)
+                for expires_at, entry_scope, cached_embedding, value in self._entries.values()
+                if entry_scope == scope and cached_embedding is not None and expires_at >= now
+            ]
+        best_value, best_score = None, self.similarity_threshold
+        for cached_embedding, value in candidates:
+            score = self._cosine_similarity(embedding, cached_embedding)
+            if score >= best_score:
+                best_value, best_score = value, score
+        return best_value
+
+    def _store(self, digest: str, scope: str, embedding: Optional[List[float]], value: Any) -> None:
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + self.ttl_seconds, scope, embedding, value)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return dot / norm if norm else 0.0
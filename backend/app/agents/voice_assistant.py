@@ -1,69 +1,123 @@
-from langchain_openai import ChatOpenAI
-from backend.app.schemas.schemas import OptimizedRecipe, PrepStep, CookStep
-from backend.app.models.models import CookingSession
+from backend.app.schemas.schemas import (
+    OptimizedRecipe, PrepStep, CookStep,
+    INGREDIENTS_ADAPTER, PREP_STEPS_ADAPTER, COOK_STEPS_ADAPTER
+)
+from backend.app.models.models import CookingSession, Recipe
 from sqlmodel import Session, select
-import os
 import re
+import os
+import asyncio
 from dotenv import load_dotenv
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
+from functools import cached_property, lru_cache
+from itertools import chain
 from .recipe_modifier import RecipeModifier
+from ._llm import get_chat_model, llm_config
+from .response_cache import ResponseCache
+import json
 
 load_dotenv()
 
+# "20 minutes", "simmer for 5 mins", "10 min"; the cook/bake/simmer/boil-for phrasings all end in one of these
+_TIMER_RE = re.compile(r'(\d+)\s*(?:minutes?|mins?)\b', re.IGNORECASE)
+_REMOVE_RE = re.compile(r'remove (.+?)(?: from|$)')
+_SERVINGS_RE = re.compile(r'(\d+)\s*(?:serving|people|person|servings)')
+# Keywords anywhere in a command; each dietary match is also a key of _COMMAND_HANDLERS
+_DIET_RE = re.compile(r'vegan|vegetarian|gluten[- ]free|dairy[- ]free')
+# When a command names several diets the earlier entry wins, wherever it appears in the command
+_DIET_PRIORITY = {'vegan': 0, 'vegetarian': 1, 'gluten-free': 2, 'gluten free': 2, 'dairy-free': 3, 'dairy free': 3}
+_SERVING_KEYWORDS_RE = re.compile(r'adjust|change|scale|serving|double|half')
+
+@lru_cache(maxsize=1024)
+def _detect_timer_minutes(instruction: str) -> Optional[int]:
+    """Timer detection, memoized since 'next', 'timer info' and 'start timer' rescan the same step text"""
+    for match in _TIMER_RE.finditer(instruction):
+        time = int(match.group(1))
+        if 0 < time <= 300:  # Reasonable cooking time range (0-5 hours)
+            return time
+    return None
+
+# Removal answers depend only on the recipe and the ingredient, so they stay valid for a long time
+_removal_cache = ResponseCache(maxsize=512, ttl_seconds=7 * 24 * 3600)
+
+# Bounds concurrent speculative LLM calls from partial transcripts
+_PREFETCH_SEMAPHORE = asyncio.Semaphore(4)
+
+# Removal cache key -> prefetch in progress, so repeated interim transcripts share one LLM call
+_PREFETCH_TASKS: Dict[str, "asyncio.Task[None]"] = {}
+
+# Spoken answers are a few sentences; the cap bounds worst-case latency if the model rambles
+_VOICE_MAX_TOKENS = 180
+# Smallest model that answers removal questions well; overridable to try cheaper or faster models
+_VOICE_LLM_MODEL = os.getenv("VOICE_LLM_MODEL", "gpt-4o-mini")
+
+# Each spoken phrase maps to a handler taking (assistant, session, recipe, db)
+_COMMAND_HANDLERS = {
+    phrase: handler
+    for phrases, handler in (
+        (('next', 'next step', 'continue'),
+         lambda self, session, recipe, db: self._handle_next_step(session, recipe, db)),
+        (('repeat', 'say again', 'repeat step'),
+         lambda self, session, recipe, db: self._handle_repeat_step(session, recipe)),
+        (('what prep', 'prep', 'preparation'),
+         lambda self, session, recipe, db: self._handle_prep_query(session, recipe)),
+        (('pause', 'stop'),
+         lambda self, session, recipe, db: self._handle_pause(session, db)),
+        (('resume', 'continue cooking'),
+         lambda self, session, recipe, db: self._handle_resume(session, db)),
+        (('time', 'how long', 'time left'),
+         lambda self, session, recipe, db: self._handle_time_query(session, recipe)),
+        (('timer info', 'timer help'),
+         lambda self, session, recipe, db: self._handle_timer_info(session, recipe)),
+        (('start timer', 'begin timer'),
+         lambda self, session, recipe, db: self._handle_start_timer(session, recipe)),
+        (('pause timer', 'stop timer'),
+         lambda self, session, recipe, db: self._handle_pause_timer(session)),
+        (('resume timer', 'restart timer', 'continue timer'),
+         lambda self, session, recipe, db: self._handle_resume_timer(session)),
+        (('ingredients', 'what ingredients'),
+         lambda self, session, recipe, db: self._handle_ingredients_query(recipe)),
+        (('make vegetarian', 'vegetarian version', 'make it vegetarian', 'vegetarian'),
+         lambda self, session, recipe, db: self._handle_dietary_variant(session, recipe, db, "vegetarian")),
+        (('make vegan', 'vegan version', 'make it vegan', 'vegan'),
+         lambda self, session, recipe, db: self._handle_dietary_variant(session, recipe, db, "vegan")),
+        (('make gluten free', 'gluten free version', 'make it gluten free', 'gluten free', 'gluten-free'),
+         lambda self, session, recipe, db: self._handle_dietary_variant(session, recipe, db, "gluten-free")),
+        (('make dairy free', 'dairy free version', 'make it dairy free', 'dairy free', 'dairy-free'),
+         lambda self, session, recipe, db: self._handle_dietary_variant(session, recipe, db, "dairy-free")),
+        (('scale up', 'double recipe', 'make more'),
+         lambda self, session, recipe, db: self._handle_scale_recipe(session, recipe, db, 2.0)),
+        (('scale down', 'half recipe', 'make less'),
+         lambda self, session, recipe, db: self._handle_scale_recipe(session, recipe, db, 0.5)),
+        (('substitute', 'replace ingredient', 'swap ingredient'),
+         lambda self, session, recipe, db: self._handle_substitute_ingredient(session, recipe, db)),
+    )
+    for phrase in phrases
+}
+
 class VoiceCookingAssistant:
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            temperature=0.3,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.recipe_modifier = RecipeModifier()
+    """
+    Stateless apart from its clients (everything per-turn lives on the session and recipe),
+    so one instance is shared by all requests.
+    """
+    def __init__(self, recipe_modifier: Optional[RecipeModifier] = None):
+        # Share the routes' modifier rather than building a second one
+        self.recipe_modifier = recipe_modifier or RecipeModifier()
+
+    @cached_property
+    def llm(self):
+        # Only ingredient removal requests need the LLM, every other command is handled locally
+        return get_chat_model(_VOICE_LLM_MODEL, temperature=0.3, streaming=True, max_tokens=_VOICE_MAX_TOKENS)
     
     def _process_voice_command(self, command: str, session: CookingSession, 
                             recipe: OptimizedRecipe, db: Session) -> Dict[str, Any]:
         """
-        Process voice commands and return appropriate responses
+        Process voice commands and return appropriate responses. command is already lowercased and stripped.
         """
-        command = command.lower().strip()
-        
-        if command in ['next', 'next step', 'continue']:
-            return self._handle_next_step(session, recipe, db)
-        elif command in ['repeat', 'say again', 'repeat step']:
-            return self._handle_repeat_step(session, recipe)
-        elif command in ['what prep', 'prep', 'preparation']:
-            return self._handle_prep_query(session, recipe)
-        elif command in ['pause', 'stop']:
-            return self._handle_pause(session, db)
-        elif command in ['resume', 'continue cooking']:
-            return self._handle_resume(session, db)
-        elif command in ['time', 'how long', 'time left']:
-            return self._handle_time_query(session, recipe)
-        elif command in ['timer info', 'timer help']:
-            return self._handle_timer_info(session, recipe)
-        elif command in ['start timer', 'begin timer']:
-            return self._handle_start_timer(session, recipe)
-        elif command in ['pause timer', 'stop timer']:
-            return self._handle_pause_timer(session)
-        elif command in ['resume timer', 'restart timer', 'continue timer']:
-            return self._handle_resume_timer(session)
-        elif command in ['ingredients', 'what ingredients']:
-            return self._handle_ingredients_query(recipe)
-        elif command in ['make vegetarian', 'vegetarian version', 'make it vegetarian', 'vegetarian']:
-            return self._handle_make_vegetarian(session, recipe, db)
-        elif command in ['make vegan', 'vegan version', 'make it vegan', 'vegan']:
-            return self._handle_make_vegan(session, recipe, db)
-        elif command in ['make gluten free', 'gluten free version', 'make it gluten free', 'gluten free', 'gluten-free']:
-            return self._handle_make_gluten_free(session, recipe, db)
-        elif command in ['make dairy free', 'dairy free version', 'make it dairy free', 'dairy free', 'dairy-free']:
-            return self._handle_make_dairy_free(session, recipe, db)
-        elif command in ['scale up', 'double recipe', 'make more']:
-            return self._handle_scale_recipe(session, recipe, db, 2.0)
-        elif command in ['scale down', 'half recipe', 'make less']:
-            return self._handle_scale_recipe(session, recipe, db, 0.5)
-        elif command in ['substitute', 'replace ingredient', 'swap ingredient']:
-            return self._handle_substitute_ingredient(session, recipe, db)
-        else:
-            return self._handle_unknown_command(command)
+        handler = _COMMAND_HANDLERS.get(command)
+        if handler:
+            return handler(self, session, recipe, db)
+        return self._handle_unknown_command(command)
     
     def _handle_next_step(self, session: CookingSession, recipe: OptimizedRecipe, db: Session) -> Dict[str, Any]:
         """Move to the next step in the cooking process"""
@@ -81,6 +135,7 @@ class VoiceCookingAssistant:
             current_prep_index = self._get_current_prep_index(session, recipe)
             if current_prep_index < len(recipe.prep_phase) - 1:
                 next_prep_index = current_prep_index + 1
+                session.current_step_index = next_prep_index
                 session.current_step = recipe.prep_phase[next_prep_index].instruction
                 timer_info = self._enhance_step_with_timer_info(session.current_step)
                 response_text = f"Next prep step: {session.current_step}"
@@ -90,6 +145,7 @@ class VoiceCookingAssistant:
                 # Move to cooking phase
                 session.current_phase = 'cook'
                 if recipe.cook_phase and len(recipe.cook_phase) > 0:
+                    session.current_step_index = 0
                     session.current_step = recipe.cook_phase[0].instruction
                     timer_info = self._enhance_step_with_timer_info(session.current_step)
                     response_text = f"Prep complete! Starting cooking phase. Step 1: {session.current_step}"
@@ -103,6 +159,7 @@ class VoiceCookingAssistant:
             current_cook_index = self._get_current_cook_index(session, recipe)
             if current_cook_index < len(recipe.cook_phase) - 1:
                 next_cook_index = current_cook_index + 1
+                session.current_step_index = next_cook_index
                 session.current_step = recipe.cook_phase[next_cook_index].instruction
                 timer_info = self._enhance_step_with_timer_info(session.current_step)
                 response_text = f"Step {next_cook_index + 1}: {session.current_step}"
@@ -115,7 +172,6 @@ class VoiceCookingAssistant:
         else:
             response_text = "No more steps available in this phase."
         
-        db.commit()
         return {
             "response": response_text,
             "current_step": session.current_step,
@@ -138,20 +194,15 @@ class VoiceCookingAssistant:
     
     def _handle_prep_query(self, session: CookingSession, recipe: OptimizedRecipe) -> Dict[str, Any]:
         """Provide prep phase information"""
-        prep_text = "Prep phase includes: "
-        prep_list = [step.instruction for step in recipe.prep_phase]
-        prep_text += "; ".join(prep_list)
-        
         return {
-            "response": prep_text,
-            "prep_steps": prep_list,
+            "response": f"Prep phase includes: {recipe.prep_text}",
+            "prep_steps": recipe.prep_instructions,
             "current_phase": session.current_phase
         }
     
     def _handle_pause(self, session: CookingSession, db: Session) -> Dict[str, Any]:
         """Pause the cooking session"""
         session.is_active = False
-        db.commit()
         
         return {
             "response": "Cooking session paused. Say 'resume' when ready to continue.",
@@ -161,7 +212,6 @@ class VoiceCookingAssistant:
     def _handle_resume(self, session: CookingSession, db: Session) -> Dict[str, Any]:
         """Resume the cooking session"""
         session.is_active = True
-        db.commit()
         
         return {
             "response": f"Resuming cooking. Current step: {session.current_step}",
@@ -185,13 +235,9 @@ class VoiceCookingAssistant:
     
     def _handle_ingredients_query(self, recipe: OptimizedRecipe) -> Dict[str, Any]:
         """List all ingredients"""
-        ingredients_text = "Ingredients needed: "
-        ingredients_list = [f"{ing.amount} {ing.unit} {ing.name}" for ing in recipe.ingredients]
-        ingredients_text += "; ".join(ingredients_list)
-        
         return {
-            "response": ingredients_text,
-            "ingredients": ingredients_list
+            "response": f"Ingredients needed: {recipe.ingredients_text}",
+            "ingredients": recipe.formatted_ingredients
         }
     
     def _handle_timer_info(self, session: CookingSession, recipe: OptimizedRecipe) -> Dict[str, Any]:
@@ -246,53 +292,147 @@ class VoiceCookingAssistant:
             "current_phase": session.current_phase
         }
 
+    def _create_ingredient_removal_prompt(self, recipe: OptimizedRecipe, ingredient_name: str) -> str:
+        """Compose the OpenAI prompt for an ingredient removal request"""
+        return (
+            f"You are a cooking assistant. The user wants to remove '{ingredient_name}' from this recipe:\n"
+            f"Ingredients: {recipe.ingredients_text}\n"
+            f"Instructions: {'; '.join(step.instruction for step in chain(recipe.prep_phase, recipe.cook_phase))}\n"
+            "What will happen to the recipe if this ingredient is removed? Suggest any replacements or adjustments needed. "
+            "Also, mention if the servings or outcome will be affected. "
+            "Answer in a few short sentences that can be read aloud."
+        )
+
     def _handle_ingredient_removal(self, recipe: OptimizedRecipe, ingredient_name: str, db: Session) -> Dict[str, Any]:
         """
         Use OpenAI to analyze the impact of removing an ingredient and suggest replacements or adjustments.
         """
-        # Compose a prompt for OpenAI
-        prompt = (
-            f"You are a cooking assistant. The user wants to remove '{ingredient_name}' from this recipe:\n"
-            f"Ingredients: {[f'{ing.amount} {ing.unit} {ing.name}' for ing in recipe.ingredients]}\n"
-            f"Instructions: {[step.instruction for step in recipe.prep_phase + recipe.cook_phase]}\n"
-            "What will happen to the recipe if this ingredient is removed? Suggest any replacements or adjustments needed. "
-            "Also, mention if the servings or outcome will be affected."
-        )
-        # Get response from OpenAI
-        response = self.llm.invoke(prompt)
+        cache_key = self._create_removal_cache_key(recipe, ingredient_name)
+        content = _removal_cache.get(cache_key)
+        if content is None:
+            prompt = self._create_ingredient_removal_prompt(recipe, ingredient_name)
+            # Get response from OpenAI
+            response = self.llm.invoke(prompt, config=llm_config("VoiceCookingAssistant", "handle_ingredient_removal"))
+            content = response.content
+            _removal_cache.set(cache_key, content)
         return {
-            "response": response.content,
+            "response": content,
             "voice": True  # Indicate this should be read aloud
         }
 
+    def _create_removal_cache_key(self, recipe: OptimizedRecipe, ingredient_name: str) -> str:
+        """Normalize an ingredient removal request into a cache key"""
+        return json.dumps({
+            "title": recipe.title,
+            "ingredients": sorted(ing.name.lower() for ing in recipe.ingredients),
+            "remove": " ".join(ingredient_name.lower().split()),
+        }, sort_keys=True)
+
+    def _match_ingredient_removal(self, command_lower: str) -> Optional[str]:
+        """Return the ingredient name if the command asks to remove one"""
+        remove_match = _REMOVE_RE.search(command_lower)
+        if remove_match:
+            return remove_match.group(1).strip()
+        return None
+
+    def _names_recipe_ingredient(self, recipe: OptimizedRecipe, ingredient_name: str) -> bool:
+        """Whether ingredient_name is made of whole words of one of the recipe's ingredients"""
+        pattern = re.compile(r'\b%s\b' % re.escape(ingredient_name))
+        return any(pattern.search(ing.name.lower()) for ing in recipe.ingredients)
+
+    async def aprefetch_voice_command(self, partial_command: str, recipe: OptimizedRecipe) -> bool:
+        """
+        Answer a partially transcribed command ahead of time so the final command is served from
+        the cache. Only ingredient removal reaches the LLM, and only names that match one of the
+        recipe's ingredients are prefetched, so half-heard words don't cost a request.
+        Touches no session or database state. Returns whether an answer is now cached.
+        """
+        ingredient_name = self._match_ingredient_removal(partial_command.lower().strip())
+        if not ingredient_name or not self._names_recipe_ingredient(recipe, ingredient_name):
+            return False
+        
+        cache_key = self._create_removal_cache_key(recipe, ingredient_name)
+        if await _removal_cache.aget(cache_key) is not None:
+            return True
+        
+        task = _PREFETCH_TASKS.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._aprefetch_removal(recipe, ingredient_name, cache_key))
+            _PREFETCH_TASKS[cache_key] = task
+            task.add_done_callback(lambda _: _PREFETCH_TASKS.pop(cache_key, None))
+        # Shielded so one caller disconnecting doesn't cancel the answer others are waiting on
+        await asyncio.shield(task)
+        return True
+
+    async def _aprefetch_removal(self, recipe: OptimizedRecipe, ingredient_name: str, cache_key: str) -> None:
+        """Fetch and cache one removal answer; rechecks the cache once a prefetch slot is free"""
+        async with _PREFETCH_SEMAPHORE:
+            if await _removal_cache.aget(cache_key) is not None:
+                return
+            prompt = self._create_ingredient_removal_prompt(recipe, ingredient_name)
+            response = await self.llm.ainvoke(prompt, config=llm_config("VoiceCookingAssistant", "aprefetch_voice_command"))
+        await _removal_cache.aset(cache_key, response.content)
+
+    async def astream_voice_command(self, command: str, session: CookingSession,
+        recipe: OptimizedRecipe, db: Session) -> AsyncIterator[str]:
+        """
+        Stream the spoken response for a command. LLM-backed answers are yielded token by token
+        so speech can start at the first token; everything else is yielded as one chunk.
+        """
+        command_lower = command.lower().strip()
+        ingredient_name = self._match_ingredient_removal(command_lower)
+        if ingredient_name:
+            cache_key = self._create_removal_cache_key(recipe, ingredient_name)
+            prefetch = _PREFETCH_TASKS.get(cache_key)
+            if prefetch is not None:
+                # The answer is already being fetched from a partial transcript; wait for it rather than asking twice
+                await asyncio.gather(asyncio.shield(prefetch), return_exceptions=True)
+            cached = await _removal_cache.aget(cache_key)
+            if cached is not None:
+                yield cached
+                return
+            
+            prompt = self._create_ingredient_removal_prompt(recipe, ingredient_name)
+            chunks = []
+            async for chunk in self.llm.astream(prompt, config=llm_config("VoiceCookingAssistant", "astream_voice_command")):
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    yield chunk.content
+            await _removal_cache.aset(cache_key, "".join(chunks))
+            return
+
+        # Non-streaming handlers may still block on OpenAI (dietary changes), keep them off the event loop
+        result = await asyncio.to_thread(self._dispatch_voice_command, command_lower, session, recipe, db)
+        yield result.get("response", "")
+
     def process_voice_command(self, command: str, session: CookingSession, 
         recipe: OptimizedRecipe, db: Session) -> Dict[str, Any]:
-        command_lower = command.lower().strip()
+        """
+        Handle a voice command. Session changes are left uncommitted; the caller commits once per turn.
+        """
+        return self._dispatch_voice_command(command.lower().strip(), session, recipe, db)
 
+    def _dispatch_voice_command(self, command_lower: str, session: CookingSession,
+        recipe: OptimizedRecipe, db: Session) -> Dict[str, Any]:
+        """Route an already lowercased and stripped command to its handler"""
         # Ingredient removal intent
-        remove_match = re.search(r'remove (.+?)(?: from|$)', command_lower)
-        if remove_match:
-            ingredient_name = remove_match.group(1).strip()
+        ingredient_name = self._match_ingredient_removal(command_lower)
+        if ingredient_name:
             return self._handle_ingredient_removal(recipe, ingredient_name, db)
 
         # Handle dietary adjustments using new methods
-        if any(keyword in command_lower for keyword in ['vegan', 'vegetarian', 'gluten-free', 'dairy-free']):
-            if 'vegan' in command_lower:
-                return self._handle_make_vegan(session, recipe, db)
-            elif 'vegetarian' in command_lower:
-                return self._handle_make_vegetarian(session, recipe, db)
-            elif 'gluten-free' in command_lower or 'gluten free' in command_lower:
-                return self._handle_make_gluten_free(session, recipe, db)
-            elif 'dairy-free' in command_lower or 'dairy free' in command_lower:
-                return self._handle_make_dairy_free(session, recipe, db)
+        diet_matches = _DIET_RE.findall(command_lower)
+        if diet_matches:
+            diet = min(diet_matches, key=_DIET_PRIORITY.__getitem__)
+            return _COMMAND_HANDLERS[diet](self, session, recipe, db)
 
         # Check for serving size adjustments
-        elif any(keyword in command_lower for keyword in ['adjust', 'change', 'scale', 'serving', 'double', 'half']):
-            return self._handle_serving_adjustment(recipe, command, db)
+        elif _SERVING_KEYWORDS_RE.search(command_lower):
+            return self._handle_serving_adjustment(recipe, command_lower, db)
 
         # Handle existing commands
         else:
-            return self._process_voice_command(command, session, recipe, db)
+            return self._process_voice_command(command_lower, session, recipe, db)
     
     def _handle_unknown_command(self, command: str) -> Dict[str, Any]:
         """Handle unknown commands"""
@@ -303,21 +443,26 @@ class VoiceCookingAssistant:
     
     def _get_current_prep_index(self, session: CookingSession, recipe: OptimizedRecipe) -> int:
         """Get the current prep step index"""
-        if not session.current_step or not recipe.prep_phase:
-            return 0
-        
-        for i, step in enumerate(recipe.prep_phase):
-            if step.instruction == session.current_step:
-                return i
-        return 0
+        return self._get_current_index(session, recipe.prep_phase)
     
     def _get_current_cook_index(self, session: CookingSession, recipe: OptimizedRecipe) -> int:
         """Get the current cooking step index"""
-        if not session.current_step or not recipe.cook_phase:
+        return self._get_current_index(session, recipe.cook_phase)
+    
+    def _get_current_index(self, session: CookingSession, steps) -> int:
+        """Read the step index tracked on the session, checked against the stored step text"""
+        if not session.current_step or not steps:
             return 0
         
-        for i, step in enumerate(recipe.cook_phase):
+        index = session.current_step_index or 0
+        if index < len(steps) and steps[index].instruction == session.current_step:
+            return index
+        
+        # Sessions started before the index was tracked only have the step text.
+        # Store the index found by the scan so it only happens once per session.
+        for i, step in enumerate(steps):
             if step.instruction == session.current_step:
+                session.current_step_index = i
                 return i
         return 0
     
@@ -325,41 +470,17 @@ class VoiceCookingAssistant:
         """Calculate remaining prep time"""
         if not recipe.prep_phase:
             return 0
-        current_index = self._get_current_prep_index(session, recipe)
-        remaining_steps = recipe.prep_phase[current_index:]
-        return sum(step.time_estimate or 0 for step in remaining_steps)
+        return recipe.prep_time_remaining[self._get_current_prep_index(session, recipe)]
     
     def _calculate_remaining_cook_time(self, session: CookingSession, recipe: OptimizedRecipe) -> int:
         """Calculate remaining cooking time"""
         if not recipe.cook_phase:
             return 0
-        current_index = self._get_current_cook_index(session, recipe)
-        remaining_steps = recipe.cook_phase[current_index:]
-        return sum(step.time_estimate or 0 for step in remaining_steps)
+        return recipe.cook_time_remaining[self._get_current_cook_index(session, recipe)]
     
     def _detect_timer_in_instruction(self, instruction: str) -> Optional[int]:
         """Detect if instruction contains a timer and return the time in minutes"""
-        # Regex patterns to detect time mentions in instructions
-        time_patterns = [
-            r'(\d+)\s*minutes?',
-            r'(\d+)\s*mins?',
-            r'(\d+)\s*min',
-            r'for\s*(\d+)\s*minutes?',
-            r'cook\s*for\s*(\d+)\s*minutes?',
-            r'bake\s*for\s*(\d+)\s*minutes?',
-            r'simmer\s*for\s*(\d+)\s*minutes?',
-            r'boil\s*for\s*(\d+)\s*minutes?',
-        ]
-        
-        for pattern in time_patterns:
-            match = re.search(pattern, instruction, re.IGNORECASE)
-            if match:
-                time_str = match.group(1)
-                if time_str:
-                    time = int(time_str)
-                    if 0 < time <= 300:  # Reasonable cooking time range (0-5 hours)
-                        return time
-        return None
+        return _detect_timer_minutes(instruction)
     
     def _enhance_step_with_timer_info(self, instruction: str) -> Dict[str, Any]:
         """Enhance step information with timer detection"""
@@ -401,79 +522,24 @@ class VoiceCookingAssistant:
             "success": True
         }
 
-    def _handle_make_vegetarian(self, session: CookingSession, recipe: OptimizedRecipe, db: Session) -> Dict[str, Any]:
-        """Create a vegetarian version of the current recipe"""
-        try:
-            modification_request = {
-                "available_ingredients": [],
-                "target_servings": recipe.servings,
-                "dietary_preferences": ["vegetarian"],
-                "substitution_preferences": {}
-            }
-            
-            modification_result = self.recipe_modifier.modify_recipe(recipe, modification_request)
-            
-            # Save the modified recipe as a new recipe
-            new_recipe_id = self._save_modified_recipe(modification_result.modified_recipe, db, "vegetarian")
-            
-            return {
-                "response": f"I've created a vegetarian version of {recipe.title}. The new recipe has been saved.",
-                "new_recipe_id": new_recipe_id,
-                "modified_recipe": modification_result.modified_recipe,
-                "modification_notes": modification_result.modification_notes,
-                "success": True
-            }
-        except Exception as e:
-            return {
-                "response": f"Sorry, I couldn't create a vegetarian version: {str(e)}",
-                "success": False
-            }
-    
-    def _handle_make_vegan(self, session: CookingSession, recipe: OptimizedRecipe, db: Session) -> Dict[str, Any]:
-        """Create a vegan version of the current recipe"""
-        try:
-            modification_request = {
-                "available_ingredients": [],
-                "target_servings": recipe.servings,
-                "dietary_preferences": ["vegan"],
-                "substitution_preferences": {}
-            }
-            
-            modification_result = self.recipe_modifier.modify_recipe(recipe, modification_request)
-            
-            # Save the modified recipe as a new recipe
-            new_recipe_id = self._save_modified_recipe(modification_result.modified_recipe, db, "vegan")
-            
-            return {
-                "response": f"I've created a vegan version of {recipe.title}. The new recipe has been saved.",
-                "new_recipe_id": new_recipe_id,
-                "modified_recipe": modification_result.modified_recipe,
-                "modification_notes": modification_result.modification_notes,
-                "success": True
-            }
-        except Exception as e:
-            return {
-                "response": f"Sorry, I couldn't create a vegan version: {str(e)}",
-                "success": False
-            }
-    
-    def _handle_make_gluten_free(self, session: CookingSession, recipe: OptimizedRecipe, db: Session) -> Dict[str, Any]:
-        """Create a gluten-free version of the current recipe"""
+    def _handle_dietary_variant(self, session: CookingSession, recipe: OptimizedRecipe, db: Session,
+                                preference: str) -> Dict[str, Any]:
+        """Create a version of the current recipe for a dietary preference (vegetarian, vegan, gluten-free, dairy-free)"""
         try:
             modification_request = {
                 "available_ingredients": [],
                 "target_servings": recipe.servings,
-                "dietary_preferences": ["gluten-free"],
+                "dietary_preferences": [preference],
                 "substitution_preferences": {}
             }
             
             modification_result = self.recipe_modifier.modify_recipe(recipe, modification_request)
             
             # Save the modified recipe as a new recipe
-            new_recipe_id = self._save_modified_recipe(modification_result.modified_recipe, db, "gluten-free")
+            new_recipe_id = self._save_modified_recipe(modification_result.modified_recipe, db, preference)
             
             return {
-                "response": f"I've created a gluten-free version of {recipe.title}. The new recipe has been saved.",
+                "response": f"I've created a {preference} version of {recipe.title}. The new recipe has been saved.",
                 "new_recipe_id": new_recipe_id,
                 "modified_recipe": modification_result.modified_recipe,
                 "modification_notes": modification_result.modification_notes,
@@ -481,35 +547,7 @@ class VoiceCookingAssistant:
             }
         except Exception as e:
             return {
-                "response": f"Sorry, I couldn't create a gluten-free version: {str(e)}",
-                "success": False
-            }
-    
-    def _handle_make_dairy_free(self, session: CookingSession, recipe: OptimizedRecipe, db: Session) -> Dict[str, Any]:
-        """Create a dairy-free version of the current recipe"""
-        try:
-            modification_request = {
-                "available_ingredients": [],
-                "target_servings": recipe.servings,
-                "dietary_preferences": ["dairy-free"],
-                "substitution_preferences": {}
-            }
-            
-            modification_result = self.recipe_modifier.modify_recipe(recipe, modification_request)
-            
-            # Save the modified recipe as a new recipe
-            new_recipe_id = self._save_modified_recipe(modification_result.modified_recipe, db, "dairy-free")
-            
-            return {
-                "response": f"I've created a dairy-free version of {recipe.title}. The new recipe has been saved.",
-                "new_recipe_id": new_recipe_id,
-                "modified_recipe": modification_result.modified_recipe,
-                "modification_notes": modification_result.modification_notes,
-                "success": True
-            }
-        except Exception as e:
-            return {
-                "response": f"Sorry, I couldn't create a dairy-free version: {str(e)}",
+                "response": f"Sorry, I couldn't create a {preference} version: {str(e)}",
                 "success": False
             }
     
@@ -552,17 +590,15 @@ class VoiceCookingAssistant:
     
     def _save_modified_recipe(self, modified_recipe: OptimizedRecipe, db: Session, modification_type: str) -> int:
         """Save a modified recipe as a new recipe in the database"""
-        from backend.app.models.models import Recipe
-        import json
-        
         # Create new recipe entry
         new_recipe = Recipe(
             title=f"{modified_recipe.title} ({modification_type.title()})",
             source_url="voice_modified",
-            original_recipe=json.dumps({"title": modified_recipe.title, "modification_type": modification_type}),
-            prep_phase=json.dumps([step.dict() for step in modified_recipe.prep_phase]),
-            cook_phase=json.dumps([step.dict() for step in modified_recipe.cook_phase]),
-            ingredients=json.dumps([ing.dict() for ing in modified_recipe.ingredients]),
+            original_recipe={"title": modified_recipe.title, "modification_type": modification_type},
+            # Dumped in one pass per list rather than step by step
+            prep_phase=PREP_STEPS_ADAPTER.dump_python(modified_recipe.prep_phase, mode="json"),
+            cook_phase=COOK_STEPS_ADAPTER.dump_python(modified_recipe.cook_phase, mode="json"),
+            ingredients=INGREDIENTS_ADAPTER.dump_python(modified_recipe.ingredients, mode="json"),
             total_time=modified_recipe.total_time,
             prep_time=modified_recipe.prep_time,
             cook_time=modified_recipe.cook_time,
@@ -571,19 +607,18 @@ class VoiceCookingAssistant:
             user_id="default_user"
         )
         
+        # flush assigns the id; the row is committed with the rest of the voice turn
         db.add(new_recipe)
-        db.commit()
-        db.refresh(new_recipe)
+        db.flush()
         
         return new_recipe.id
 
-    def _handle_serving_adjustment(self, recipe: OptimizedRecipe, command: str, db: Session) -> Dict[str, Any]:
-        """Handle serving size adjustments"""
-        command_lower = command.lower()
+    def _handle_serving_adjustment(self, recipe: OptimizedRecipe, command_lower: str, db: Session) -> Dict[str, Any]:
+        """Handle serving size adjustments for an already lowercased command"""
         new_servings = None
         
         # Check for specific serving numbers
-        serving_match = re.search(r'(\d+)\s*(?:serving|people|person|servings)', command_lower)
+        serving_match = _SERVINGS_RE.search(command_lower)
         if serving_match:
             new_servings = int(serving_match.group(1))
         # Check for double/half adjustments
@@ -611,16 +646,22 @@ class VoiceCookingAssistant:
     
         
     def apply_adjusted_recipe(self, recipe: OptimizedRecipe, adjusted_data: dict) -> OptimizedRecipe:
-   
-    # Update ingredients
-     for adj_ing in adjusted_data['adjusted_ingredients']:
+        """Return a copy of the recipe with adjusted ingredient amounts and servings (the routes share recipe instances)"""
+        # Update ingredients, matching names case-insensitively; the last adjustment for a name wins
+        adjustments = {adj_ing['name'].lower(): adj_ing for adj_ing in adjusted_data['adjusted_ingredients']}
+        ingredients = []
         for ing in recipe.ingredients:
-            if ing.name.lower() == adj_ing['name'].lower():
-                ing.amount = adj_ing['amount']
-                ing.unit = adj_ing['unit']
-    
-    # Update servings if provided
-     if 'serving_size' in adjusted_data:
-        recipe.servings = adjusted_data['serving_size']
-    
-        return recipe
\ No newline at end of file
+            adj_ing = adjustments.get(ing.name.lower())
+            if adj_ing:
+                ing = ing.model_copy(update={'amount': adj_ing['amount'], 'unit': adj_ing['unit']})
+            ingredients.append(ing)
+        update = {'ingredients': ingredients}
+        
+        # Update servings if provided
+        if 'serving_size' in adjusted_data:
+            update['servings'] = adjusted_data['serving_size']
+        
+        adjusted_recipe = recipe.model_copy(update=update)
+        # The shallow copy carries over the original's cached views
+        adjusted_recipe.clear_cached_views()
+        return adjusted_recipe
@@ -1,4 +1,6 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import event, inspect, text
+import orjson
 import os
 from dotenv import load_dotenv
 
@@ -7,12 +9,53 @@ load_dotenv()
 # Database URL - you can change this to your preferred database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./prep_pad.db")
 
-# Create engine
-engine = create_engine(DATABASE_URL, echo=True)
+_IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Create engine. SQL logging is opt-in (SQL_ECHO=1): echoing every statement is slow.
+# Sessions are opened and closed on FastAPI's threadpool, so SQLite connections must be shareable across threads.
+# JSON columns go through orjson instead of the stdlib json module
+engine = create_engine(
+    DATABASE_URL,
+    echo=os.getenv("SQL_ECHO") == "1",
+    connect_args={"check_same_thread": False} if _IS_SQLITE else {},
+    json_serializer=lambda value: orjson.dumps(value).decode(),
+    json_deserializer=orjson.loads
+)
+
+if _IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets reads run alongside a write, and NORMAL sync skips the fsync on every commit"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
 
 def create_db():
     """Create all tables"""
     SQLModel.metadata.create_all(engine)
+    add_missing_columns()
+    add_missing_indexes()
+
+def add_missing_columns():
+    """Add model columns missing from existing tables (create_all only creates whole tables)"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                default = f" DEFAULT {column.server_default.arg}" if column.server_default is not None else ""
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{default}"))
+
+def add_missing_indexes():
+    """Create model indexes missing from existing tables (create_all skips tables that already exist)"""
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
 
 def get_db():
     """Dependency to get database session"""
@@ -1,16 +1,32 @@
 from fastapi import FastAPI
 from backend.routes import recipe_agent
 from backend.app.db.database import create_db
+from backend.app.agents._llm import prewarm
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+import asyncio
+import logging
+import os
+
+# Show the agents' per-call LLM timing logs without turning on INFO logging for every library
+logging.basicConfig(level=logging.WARNING)
+logging.getLogger("backend.app.agents").setLevel(logging.INFO)
 
 #Create the database
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup code
     create_db()
+    # Warm the OpenAI connection pools in the background so startup isn't delayed
+    prewarm_task = asyncio.create_task(prewarm()) if os.getenv("OPENAI_API_KEY") else None
     yield
     # Shutdown code (optional)
+    if prewarm_task:
+        prewarm_task.cancel()
+    # Only close the scraper if a request built it
+    if recipe_agent.get_scraper.cache_info().currsize:
+        await recipe_agent.get_scraper().aclose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -38,4 +54,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+# Recipe JSON is large and repetitive; streamed NDJSON chunks are sync-flushed, so they still arrive as written
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=5)
 #uvicorn backend.app.main:app --reload
\ No newline at end of file
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, Index, JSON
 from datetime import datetime
 from typing import Optional, List
 import json
@@ -13,24 +14,26 @@ class User(SQLModel, table=True):
 class Recipe(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
-    source_url: str
-    original_recipe: str  # JSON string of original parsed recipe
-    prep_phase: str  # JSON string of prep steps
-    cook_phase: str  # JSON string of cooking steps
-    ingredients: str  # JSON string of ingredients list
+    source_url: str = Field(index=True)
+    # JSON columns: SQLAlchemy (de)serializes them, so rows hold plain dicts and lists
+    original_recipe: dict = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))  # original parsed recipe
+    prep_phase: List[dict] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))  # prep steps
+    cook_phase: List[dict] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))  # cooking steps
+    ingredients: List[dict] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))  # ingredients list
     total_time: Optional[int] = None  # Total cooking time in minutes
     prep_time: Optional[int] = None  # Prep time in minutes
     cook_time: Optional[int] = None  # Cook time in minutes
     servings: Optional[int] = None
     difficulty: Optional[str] = None  # easy, medium, hard
-    user_id: str
+    user_id: str = Field(index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class CookingSession(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    recipe_id: int = Field(foreign_key="recipe.id")
-    user_id: str
+    recipe_id: int = Field(foreign_key="recipe.id", index=True)
+    user_id: str = Field(index=True)
     current_step: Optional[str] = None
+    current_step_index: int = Field(default=0, sa_column_kwargs={"server_default": "0"})  # position within current_phase
     current_phase: Optional[str] = None  # 'prep' or 'cook'
     is_active: bool = Field(default=True)
     started_at: datetime = Field(default_factory=datetime.utcnow)
@@ -38,12 +41,24 @@ class CookingSession(SQLModel, table=True):
 
 class VoiceCommand(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    session_id: int = Field(foreign_key="cookingsession.id")
+    session_id: int = Field(foreign_key="cookingsession.id", index=True)
     command: str  # 'next', 'repeat', 'what_prep', etc.
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class Favorite(SQLModel, table=True):
+    # Favorites are always looked up by user, and usually by user and recipe; unique so adding is an upsert
+    __table_args__ = (Index("uq_favorite_user_id_recipe_id", "user_id", "recipe_id", unique=True),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: str
     recipe_id: int = Field(foreign_key="recipe.id")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ParseJob(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    url: str
+    status: str = Field(default="pending")  # 'pending', 'done' or 'failed'
+    recipe_id: Optional[int] = Field(default=None, foreign_key="recipe.id")
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
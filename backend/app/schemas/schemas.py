@@ -1,28 +1,64 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, TypeAdapter
+from typing import Annotated, List, Optional, Dict, Any, Tuple
 from datetime import datetime
+from functools import cached_property
+from contextlib import suppress
+import re
+
+_AMOUNT_RE = re.compile(r'\d+\.?\d*')
 
 class RecipeURLRequest(BaseModel):
     url: str
 
+# Frozen like the steps; adjustments replace an ingredient with model_copy(update=...)
 class Ingredient(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     amount: Optional[str] = None
     unit: Optional[str] = None
     notes: Optional[str] = None
 
+    # (amount string, parsed number) so scaling parses each amount once
+    _parsed_amount: Tuple[Optional[str], Optional[float]] = PrivateAttr(default=(None, None))
+
+    def model_post_init(self, __context: Any) -> None:
+        self._parsed_amount = (self.amount, _parse_amount(self.amount))
+
+    @property
+    def numeric_amount(self) -> Optional[float]:
+        """Leading number in amount, e.g. 1.5 for "1.5 cups"; None if there isn't one"""
+        source, value = self._parsed_amount
+        if source != self.amount:
+            # copied with a new amount, which skips model_post_init
+            value = _parse_amount(self.amount)
+            self._parsed_amount = (self.amount, value)
+        return value
+
+def _parse_amount(amount: Optional[str]) -> Optional[float]:
+    if not amount:
+        return None
+    with suppress(ValueError, IndexError):
+        return float(_AMOUNT_RE.findall(amount)[0])
+    return None
+
 class RecipeStep(BaseModel):
     step_number: int
     instruction: str
     time_estimate: Optional[int] = None  # minutes
     parallel_tasks: Optional[List[str]] = None
 
+# Steps are never edited once parsed; frozen makes that explicit
 class PrepStep(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     instruction: str
     time_estimate: Optional[int] = None
     category: Optional[str] = None  # 'chopping', 'measuring', 'preheating', etc.
 
 class CookStep(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     step_number: int
     instruction: str
     time_estimate: Optional[int] = None
@@ -40,10 +76,80 @@ class OptimizedRecipe(BaseModel):
     servings: Optional[int] = None
     difficulty: Optional[str] = None
 
+    @cached_property
+    def prep_time_remaining(self) -> List[int]:
+        """Entry i is the estimated prep time left from prep step i onward"""
+        return _suffix_sums([step.time_estimate or 0 for step in self.prep_phase])
+
+    @cached_property
+    def cook_time_remaining(self) -> List[int]:
+        """Entry i is the estimated cooking time left from cook step i onward"""
+        return _suffix_sums([step.time_estimate or 0 for step in self.cook_phase])
+
+    @cached_property
+    def formatted_ingredients(self) -> List[str]:
+        """Ingredients as "amount unit name" lines for the voice assistant"""
+        return [f"{ing.amount} {ing.unit} {ing.name}" for ing in self.ingredients]
+
+    @cached_property
+    def prep_instructions(self) -> List[str]:
+        """Instruction text of each prep step"""
+        return [step.instruction for step in self.prep_phase]
+
+    @cached_property
+    def ingredients_text(self) -> str:
+        """formatted_ingredients joined for speech and prompts"""
+        return "; ".join(self.formatted_ingredients)
+
+    @cached_property
+    def prep_text(self) -> str:
+        """prep_instructions joined for speech"""
+        return "; ".join(self.prep_instructions)
+
+    def clear_cached_views(self) -> None:
+        """Drop the cached properties above after ingredients or steps are edited in place"""
+        for name in ("prep_time_remaining", "cook_time_remaining", "formatted_ingredients", "prep_instructions",
+                     "ingredients_text", "prep_text"):
+            self.__dict__.pop(name, None)
+
+def _suffix_sums(values: List[int]) -> List[int]:
+    sums = [0] * (len(values) + 1)
+    for i in range(len(values) - 1, -1, -1):
+        sums[i] = sums[i + 1] + values[i]
+    return sums
+
+# Validate or serialize whole recipe lists in one call instead of item by item
+INGREDIENTS_ADAPTER = TypeAdapter(List[Ingredient])
+PREP_STEPS_ADAPTER = TypeAdapter(List[PrepStep])
+COOK_STEPS_ADAPTER = TypeAdapter(List[CookStep])
+
 class VoiceCommandRequest(BaseModel):
-    command: str  # 'next', 'repeat', 'what_prep', 'pause', 'resume'
+    # 'next', 'repeat', 'what_prep', 'pause', 'resume'; spoken commands are short, so long input is rejected up front
+    command: str = Field(max_length=500)
     session_id: int
 
+class VoiceCommandBatchRequest(BaseModel):
+    """Several voice commands for one session, processed in order"""
+    commands: List[Annotated[str, Field(max_length=500)]] = Field(min_length=1, max_length=20)
+    session_id: int
+
+class RecipeSummary(BaseModel):
+    """Listing fields of a stored recipe, without its steps and ingredients"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    source_url: str
+    total_time: Optional[int] = None
+    prep_time: Optional[int] = None
+    cook_time: Optional[int] = None
+    servings: Optional[int] = None
+    difficulty: Optional[str] = None
+    created_at: datetime
+
+class RecipeSummaryList(BaseModel):
+    recipes: List[RecipeSummary]
+
 class CookingSessionResponse(BaseModel):
     session_id: int
     recipe_title: str
@@ -65,6 +171,18 @@ class RecipeModificationRequest(BaseModel):
     dietary_preferences: Optional[List[str]] = None  # e.g., ["vegetarian", "gluten-free"]
     substitution_preferences: Optional[Dict[str, str]] = None  # {"meat": "tofu", "butter": "olive oil"}
 
+class RecipeModificationOptions(BaseModel):
+    """One variant in a modification batch: a RecipeModificationRequest without the recipe"""
+    available_ingredients: List[AvailableIngredient] = []
+    target_servings: Optional[int] = None
+    dietary_preferences: Optional[List[str]] = None
+    substitution_preferences: Optional[Dict[str, str]] = None
+
+class RecipeModificationBatchRequest(BaseModel):
+    """Several modifications of one recipe, answered in request order"""
+    recipe_id: int
+    modifications: List[RecipeModificationOptions] = Field(min_length=1, max_length=8)
+
 class IngredientSubstitution(BaseModel):
     original_name: str
     original_amount: str
@@ -75,6 +193,14 @@ class IngredientSubstitution(BaseModel):
     substitution_reason: str
     substitution_notes: Optional[str] = None
 
+# Structured outputs requested from OpenAI by the recipe modifier
+class SubstitutionSuggestions(BaseModel):
+    substitutions: List[IngredientSubstitution]
+
+class RecipeModificationDraft(BaseModel):
+    substitutions: List[IngredientSubstitution]
+    modified_recipe: OptimizedRecipe
+
 class RecipeModificationResponse(BaseModel):
     modified_recipe: OptimizedRecipe
     substitutions_made: List[IngredientSubstitution]
@@ -1,29 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
-from backend.app.db.database import get_db
-from backend.app.models.models import Recipe, CookingSession, VoiceCommand, Favorite
+from sqlalchemy import exists, inspect
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import defer, load_only, object_session
+from backend.app.db.database import engine, get_db
+from backend.app.models.models import Recipe, CookingSession, VoiceCommand, Favorite, ParseJob
 from backend.app.schemas.schemas import (
-    RecipeURLRequest, OptimizedRecipe, VoiceCommandRequest, 
-    CookingSessionResponse, RecipeModificationRequest, RecipeModificationResponse
+    RecipeURLRequest, OptimizedRecipe, VoiceCommandRequest, VoiceCommandBatchRequest,
+    CookingSessionResponse, RecipeModificationRequest, RecipeModificationResponse, RecipeModificationBatchRequest,
+    RecipeSummaryList, INGREDIENTS_ADAPTER, PREP_STEPS_ADAPTER, COOK_STEPS_ADAPTER
 )
 from backend.scrapers.recipe_scraper import RecipeScraper
 from backend.app.agents.recipe_optimizer import RecipeOptimizer
 from backend.app.agents.recipe_modifier import RecipeModifier
 from backend.app.agents.voice_assistant import VoiceCookingAssistant
-import json
-from datetime import datetime
-from typing import List
+from backend.app.agents._llm import llm_config
+from backend.app.agents.response_cache import ResponseCache
+from backend.app.agents.json_stream import JsonArrayItemStream
+import logging
+import orjson
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 router = APIRouter()
 
-# Initialize services
-scraper = RecipeScraper()
-optimizer = RecipeOptimizer()
-recipe_modifier = RecipeModifier()
-voice_assistant = VoiceCookingAssistant()
+logger = logging.getLogger(__name__)
 
+# Services hold no per-request state: each is built on first use, once per worker process.
+# Routes take them as dependencies, so tests can swap them with app.dependency_overrides.
+@lru_cache(maxsize=1)
+def get_scraper() -> RecipeScraper:
+    return RecipeScraper()
+
+@lru_cache(maxsize=1)
+def get_optimizer() -> RecipeOptimizer:
+    return RecipeOptimizer()
+
+@lru_cache(maxsize=1)
+def get_recipe_modifier() -> RecipeModifier:
+    return RecipeModifier()
+
+@lru_cache(maxsize=1)
+def get_voice_assistant() -> VoiceCookingAssistant:
+    return VoiceCookingAssistant(get_recipe_modifier())
+
+# Parsed recipes, keyed by (id, created_at) since stored recipes are never edited and
+# created_at tells apart an id that SQLite reused after a delete
+_OPTIMIZED_RECIPE_CACHE_SIZE = 256
+_optimized_recipes: "OrderedDict[Tuple[int, datetime], OptimizedRecipe]" = OrderedDict()
+_optimized_recipes_lock = threading.Lock()
+
+# Modification suggestions depend only on the recipe's title and ingredients, which are in the prompt
+_suggestions_cache = ResponseCache(ttl_seconds=24 * 3600)
+
+# Suggestion arrays streamed item by item -> event type
+_STREAMED_SUGGESTIONS = {
+    "dietary_modifications": "dietary_modification",
+    "healthier_substitutions": "healthier_substitution",
+    "common_alternatives": "common_alternative",
+}
+
+# Ingredients the suggestions fallback offers a vegetarian swap for
+_MEAT_RE = re.compile(r'chicken|beef|pork|fish|meat')
+
+# INSERT ... ON CONFLICT DO NOTHING constructs for the supported databases
+_DIALECT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+# How long a parsed URL is reused before /parse_recipe scrapes it again
+_REPARSE_AFTER = timedelta(days=30)
+
+# Load options for recipe listings: just the RecipeSummary columns
+_RECIPE_SUMMARY_COLUMNS = load_only(
+    Recipe.id, Recipe.title, Recipe.source_url, Recipe.total_time, Recipe.prep_time,
+    Recipe.cook_time, Recipe.servings, Recipe.difficulty, Recipe.created_at
+)
+
+# Load options for reads that go through _to_optimized_recipe: the JSON columns are only fetched on a cache miss
+_DEFER_RECIPE_JSON = [
+    defer(Recipe.original_recipe), defer(Recipe.prep_phase), defer(Recipe.cook_phase), defer(Recipe.ingredients)
+]
+
+# Plain def: the handler only does blocking database work, so FastAPI runs it in the threadpool
 @router.post("/create_recipe", response_model=OptimizedRecipe)
-async def create_recipe(recipe_data: OptimizedRecipe, db: Session = Depends(get_db)):
+def create_recipe(recipe_data: OptimizedRecipe, db: Session = Depends(get_db)):
     """
     Create a recipe directly without scraping
     """
@@ -32,10 +97,10 @@ async def create_recipe(recipe_data: OptimizedRecipe, db: Session = Depends(get_
         recipe = Recipe(
             title=recipe_data.title,
             source_url="direct_creation",
-            original_recipe=json.dumps({"title": recipe_data.title}),
-            prep_phase=json.dumps([step.dict() for step in recipe_data.prep_phase]),
-            cook_phase=json.dumps([step.dict() for step in recipe_data.cook_phase]),
-            ingredients=json.dumps([ing.dict() for ing in recipe_data.ingredients]),
+            original_recipe={"title": recipe_data.title},
+            prep_phase=PREP_STEPS_ADAPTER.dump_python(recipe_data.prep_phase, mode="json"),
+            cook_phase=COOK_STEPS_ADAPTER.dump_python(recipe_data.cook_phase, mode="json"),
+            ingredients=INGREDIENTS_ADAPTER.dump_python(recipe_data.ingredients, mode="json"),
             total_time=recipe_data.total_time,
             prep_time=recipe_data.prep_time,
             cook_time=recipe_data.cook_time,
@@ -46,82 +111,135 @@ async def create_recipe(recipe_data: OptimizedRecipe, db: Session = Depends(get_
         
         db.add(recipe)
         db.commit()
-        db.refresh(recipe)
         
         return recipe_data
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create recipe: {str(e)}")
 
+async def _parse_and_save_recipe(url: str, db: Session, scraper: RecipeScraper,
+                                 optimizer: RecipeOptimizer) -> OptimizedRecipe:
+    """
+    Scrape a recipe URL, optimize it and store it; returns the optimized recipe with its new id.
+    A URL parsed within _REPARSE_AFTER returns the stored recipe instead, skipping the scrape and the LLM.
+    """
+    existing = db.exec(
+        select(Recipe)
+        .where(Recipe.source_url == url, Recipe.created_at >= datetime.utcnow() - _REPARSE_AFTER)
+        .order_by(Recipe.id.desc())
+    ).first()
+    if existing:
+        # Copy so the shared cached recipe isn't modified
+        return _to_optimized_recipe(existing).model_copy(update={"recipe_id": existing.id})
+    
+    # Scrape the recipe from the URL
+    scraped_data = await scraper.ascrape_recipe(url)
+    
+    # Optimize the recipe
+    optimized_recipe = await optimizer.aoptimize_recipe(scraped_data)
+    
+    # Save to database
+    recipe = Recipe(
+        title=optimized_recipe.title,
+        source_url=url,
+        original_recipe=scraped_data,
+        prep_phase=PREP_STEPS_ADAPTER.dump_python(optimized_recipe.prep_phase, mode="json"),
+        cook_phase=COOK_STEPS_ADAPTER.dump_python(optimized_recipe.cook_phase, mode="json"),
+        ingredients=INGREDIENTS_ADAPTER.dump_python(optimized_recipe.ingredients, mode="json"),
+        total_time=optimized_recipe.total_time,
+        prep_time=optimized_recipe.prep_time,
+        cook_time=optimized_recipe.cook_time,
+        servings=optimized_recipe.servings,
+        difficulty=optimized_recipe.difficulty,
+        user_id="default_user"  # In a real app, this would come from authentication
+    )
+    
+    # flush assigns the id; reading it before the commit avoids the reload of expired attributes after it
+    db.add(recipe)
+    db.flush()
+    optimized_recipe.recipe_id = recipe.id
+    db.commit()
+    return optimized_recipe
+
 @router.post("/parse_recipe", response_model=OptimizedRecipe)
-async def parse_recipe(request: RecipeURLRequest, db: Session = Depends(get_db)):
+async def parse_recipe(request: RecipeURLRequest, db: Session = Depends(get_db),
+                       scraper: RecipeScraper = Depends(get_scraper),
+                       optimizer: RecipeOptimizer = Depends(get_optimizer)):
     """
     Parse a recipe from a URL and optimize it for mise-en-place cooking
     """
     try:
-        # Scrape the recipe from the URL
-        scraped_data = scraper.scrape_recipe(request.url)
-        
-        # Optimize the recipe
-        optimized_recipe = optimizer.optimize_recipe(scraped_data)
-        
-        # Save to database
-        recipe = Recipe(
-            title=optimized_recipe.title,
-            source_url=request.url,
-            original_recipe=json.dumps(scraped_data),
-            prep_phase=json.dumps([step.dict() for step in optimized_recipe.prep_phase]),
-            cook_phase=json.dumps([step.dict() for step in optimized_recipe.cook_phase]),
-            ingredients=json.dumps([ing.dict() for ing in optimized_recipe.ingredients]),
-            total_time=optimized_recipe.total_time,
-            prep_time=optimized_recipe.prep_time,
-            cook_time=optimized_recipe.cook_time,
-            servings=optimized_recipe.servings,
-            difficulty=optimized_recipe.difficulty,
-            user_id="default_user"  # In a real app, this would come from authentication
-        )
-        
-        db.add(recipe)
-        db.commit()
-        db.refresh(recipe)
-        
-        optimized_recipe.recipe_id = recipe.id
-        return optimized_recipe
-        
+        return await _parse_and_save_recipe(request.url, db, scraper, optimizer)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to parse recipe: {str(e)}")
 
-@router.get("/recipes")
-def get_recipes(db: Session = Depends(get_db)):
+async def _run_parse_job(job_id: int, url: str, scraper: RecipeScraper, optimizer: RecipeOptimizer):
+    """Background task behind /parse_recipe/jobs; records the outcome on the ParseJob row"""
+    with Session(engine) as db:
+        job = db.get(ParseJob, job_id)
+        try:
+            optimized_recipe = await _parse_and_save_recipe(url, db, scraper, optimizer)
+            job.status = "done"
+            job.recipe_id = optimized_recipe.recipe_id
+        except Exception as e:
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.add(job)
+        db.commit()
+
+@router.post("/parse_recipe/jobs", status_code=202)
+def start_parse_recipe_job(request: RecipeURLRequest, background_tasks: BackgroundTasks,
+                           db: Session = Depends(get_db),
+                           scraper: RecipeScraper = Depends(get_scraper),
+                           optimizer: RecipeOptimizer = Depends(get_optimizer)):
     """
-    Get all saved recipes
+    Start parsing a recipe URL without waiting for it; poll /parse_recipe/jobs/{job_id} for the result
+    """
+    job = ParseJob(url=request.url)
+    db.add(job)
+    db.flush()
+    response = {"job_id": job.id, "status": job.status}
+    db.commit()
+    
+    background_tasks.add_task(_run_parse_job, response["job_id"], request.url, scraper, optimizer)
+    return response
+
+@router.get("/parse_recipe/jobs/{job_id}")
+def get_parse_recipe_job(job_id: int, db: Session = Depends(get_db)):
     """
-    recipes = db.exec(select(Recipe)).all()
+    Get the status of a recipe parsing job, and the recipe id once it is done
+    """
+    job = db.get(ParseJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Parse job not found")
+    
+    return {"job_id": job.id, "status": job.status, "recipe_id": job.recipe_id, "error": job.error}
+
+@router.get("/recipes", response_model=RecipeSummaryList)
+def get_recipes(limit: Optional[int] = Query(None, ge=1, le=500), offset: int = Query(0, ge=0),
+                db: Session = Depends(get_db)):
+    """
+    Get saved recipes, without their steps and ingredients. Pass limit/offset for a page;
+    without a limit every recipe is returned.
+    """
+    statement = select(Recipe).options(_RECIPE_SUMMARY_COLUMNS).order_by(Recipe.id).offset(offset)
+    if limit is not None:
+        statement = statement.limit(limit)
+    recipes = db.exec(statement).all()
     return {"recipes": recipes}
 
-@router.get("/recipe/{recipe_id}")
+@router.get("/recipe/{recipe_id}", response_model=OptimizedRecipe)
 def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
     """
     Get a specific recipe by ID
     """
-    recipe = db.get(Recipe, recipe_id)
+    recipe = db.get(Recipe, recipe_id, options=_DEFER_RECIPE_JSON)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     
-    # Parse JSON fields back to objects
-    optimized_recipe = OptimizedRecipe(
-        title=recipe.title,
-        ingredients=[json.loads(ing) for ing in json.loads(recipe.ingredients)],
-        prep_phase=[json.loads(step) for step in json.loads(recipe.prep_phase)],
-        cook_phase=[json.loads(step) for step in json.loads(recipe.cook_phase)],
-        total_time=recipe.total_time,
-        prep_time=recipe.prep_time,
-        cook_time=recipe.cook_time,
-        servings=recipe.servings,
-        difficulty=recipe.difficulty
-    )
-    
-    return optimized_recipe
+    return _to_optimized_recipe(recipe)
 
 @router.delete("/recipe/{recipe_id}")
 def delete_recipe(recipe_id: int, db: Session = Depends(get_db)):
@@ -134,6 +252,8 @@ def delete_recipe(recipe_id: int, db: Session = Depends(get_db)):
     
     db.delete(recipe)
     db.commit()
+    with _optimized_recipes_lock:
+        _optimized_recipes.pop((recipe.id, recipe.created_at), None)
     
     return {"message": "Recipe deleted successfully"}
 
@@ -150,16 +270,15 @@ def start_cooking_session(recipe_id: int, db: Session = Depends(get_db)):
     session = CookingSession(
         recipe_id=recipe_id,
         user_id="default_user",  # In a real app, this would come from authentication
-        current_step=json.loads(recipe.prep_phase)[0]["instruction"] if json.loads(recipe.prep_phase) else None,
+        current_step=recipe.prep_phase[0]["instruction"] if recipe.prep_phase else None,
         current_phase="prep",
         is_active=True
     )
     
+    # Build the response between flush and commit, while nothing is expired
     db.add(session)
-    db.commit()
-    db.refresh(session)
-    
-    return CookingSessionResponse(
+    db.flush()
+    response = CookingSessionResponse(
         session_id=session.id,
         recipe_title=recipe.title,
         current_step=session.current_step,
@@ -167,71 +286,173 @@ def start_cooking_session(recipe_id: int, db: Session = Depends(get_db)):
         is_active=session.is_active,
         started_at=session.started_at
     )
+    db.commit()
+    
+    return response
 
-@router.post("/voice_command")
-def process_voice_command(request: VoiceCommandRequest, db: Session = Depends(get_db)):
+def _to_optimized_recipe(recipe: Recipe) -> OptimizedRecipe:
     """
-    Process voice commands during cooking
+    Build an OptimizedRecipe from a stored recipe row. The result is cached and shared
+    between requests, so callers must not modify it.
     """
-    session = db.get(CookingSession, request.session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Cooking session not found")
+    key = (recipe.id, recipe.created_at)
+    with _optimized_recipes_lock:
+        optimized_recipe = _optimized_recipes.get(key)
+        if optimized_recipe is not None:
+            _optimized_recipes.move_to_end(key)
+            return optimized_recipe
     
-    recipe = db.get(Recipe, session.recipe_id)
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
-    
-    # Parse recipe data safely
+    optimized_recipe = _parse_recipe_row(recipe)
+    with _optimized_recipes_lock:
+        _optimized_recipes[key] = optimized_recipe
+        while len(_optimized_recipes) > _OPTIMIZED_RECIPE_CACHE_SIZE:
+            _optimized_recipes.popitem(last=False)
+    return optimized_recipe
+
+def _parse_recipe_row(recipe: Recipe) -> OptimizedRecipe:
+    # Fetch deferred JSON columns in one query rather than one per attribute
+    unloaded = inspect(recipe).unloaded & {"ingredients", "prep_phase", "cook_phase"}
+    if unloaded:
+        object_session(recipe).refresh(recipe, sorted(unloaded))
     try:
-        ingredients_data = json.loads(recipe.ingredients) if recipe.ingredients else []
-        prep_phase_data = json.loads(recipe.prep_phase) if recipe.prep_phase else []
-        cook_phase_data = json.loads(recipe.cook_phase) if recipe.cook_phase else []
-        
-        optimized_recipe = OptimizedRecipe(
+        return OptimizedRecipe(
             title=recipe.title,
-            ingredients=ingredients_data,
-            prep_phase=prep_phase_data,
-            cook_phase=cook_phase_data,
+            ingredients=recipe.ingredients or [],
+            prep_phase=recipe.prep_phase or [],
+            cook_phase=recipe.cook_phase or [],
             total_time=recipe.total_time,
             prep_time=recipe.prep_time,
             cook_time=recipe.cook_time,
             servings=recipe.servings,
             difficulty=recipe.difficulty
         )
-    except (json.JSONDecodeError, TypeError) as e:
+    except (ValueError, TypeError) as e:
         raise HTTPException(status_code=400, detail=f"Failed to parse recipe data: {str(e)}")
+
+def _load_voice_context(session_id: int, db: Session):
+    """
+    Load the cooking session and its recipe for a voice command, in one query
+    """
+    row = db.exec(
+        select(CookingSession, Recipe)
+        .join(Recipe, Recipe.id == CookingSession.recipe_id, isouter=True)
+        .where(CookingSession.id == session_id)
+        .options(*_DEFER_RECIPE_JSON)
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Cooking session not found")
+    
+    session, recipe = row
+    if not recipe:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    
+    return session, _to_optimized_recipe(recipe)
+
+def _log_voice_command(session_id: int, *commands: str):
+    """
+    Record voice commands. Runs as a background task after the response is sent,
+    with its own database session since the request's is closed by then.
+    """
+    with Session(engine) as db:
+        db.add_all([VoiceCommand(session_id=session_id, command=command) for command in commands])
+        db.commit()
+
+# A response_model lets FastAPI serialize straight to JSON bytes with pydantic-core
+@router.post("/voice_command", response_model=Dict[str, Any])
+def process_voice_command(request: VoiceCommandRequest, background_tasks: BackgroundTasks,
+                          db: Session = Depends(get_db),
+                          voice_assistant: VoiceCookingAssistant = Depends(get_voice_assistant)):
+    """
+    Process voice commands during cooking
+    """
+    session, optimized_recipe = _load_voice_context(request.session_id, db)
     
     # Process the voice command
-    print(f'\n\n{request.command}\n\n')
     response = voice_assistant.process_voice_command(
         request.command, session, optimized_recipe, db
     )
-    print(f'\n\n{response}\n\n')
+    logger.debug("voice command %r -> %r", request.command, response)
     
-    # Log the voice command
-    voice_cmd = VoiceCommand(
-        session_id=request.session_id,
-        command=request.command
-    )
-    db.add(voice_cmd)
+    # One commit for any session changes the command made; the log entry waits until after the response
     db.commit()
+    background_tasks.add_task(_log_voice_command, request.session_id, request.command)
     
     return response
 
-@router.get("/cooking_session/{session_id}")
+@router.post("/voice_command_batch", response_model=Dict[str, List[Dict[str, Any]]])
+def process_voice_command_batch(request: VoiceCommandBatchRequest, background_tasks: BackgroundTasks,
+                                db: Session = Depends(get_db),
+                                voice_assistant: VoiceCookingAssistant = Depends(get_voice_assistant)):
+    """
+    Process several voice commands for one session in order, with one round trip and one commit
+    """
+    session, optimized_recipe = _load_voice_context(request.session_id, db)
+    
+    responses = [
+        voice_assistant.process_voice_command(command, session, optimized_recipe, db)
+        for command in request.commands
+    ]
+    
+    db.commit()
+    background_tasks.add_task(_log_voice_command, request.session_id, *request.commands)
+    
+    return {"responses": responses}
+
+@router.post("/voice_command/stream")
+async def stream_voice_command(request: VoiceCommandRequest, background_tasks: BackgroundTasks,
+                               db: Session = Depends(get_db),
+                               voice_assistant: VoiceCookingAssistant = Depends(get_voice_assistant)):
+    """
+    Process a voice command and stream the spoken response as server-sent events,
+    so text-to-speech can start on the first token
+    """
+    session, optimized_recipe = _load_voice_context(request.session_id, db)
+    # Runs once the stream has finished
+    background_tasks.add_task(_log_voice_command, request.session_id, request.command)
+    
+    async def event_stream():
+        try:
+            async for token in voice_assistant.astream_voice_command(
+                request.command, session, optimized_recipe, db
+            ):
+                yield b"data: " + orjson.dumps({"token": token}) + b"\n\n"
+            yield b"data: [DONE]\n\n"
+        finally:
+            # One commit for any session changes the command made
+            db.commit()
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@router.post("/voice_command/prefetch")
+async def prefetch_voice_command(request: VoiceCommandRequest, db: Session = Depends(get_db),
+                                 voice_assistant: VoiceCookingAssistant = Depends(get_voice_assistant)):
+    """
+    Warm the response cache from a partial transcript while the user is still speaking.
+    Nothing is logged and the session is left unchanged.
+    """
+    _, optimized_recipe = _load_voice_context(request.session_id, db)
+    prefetched = await voice_assistant.aprefetch_voice_command(request.command, optimized_recipe)
+    return {"prefetched": prefetched}
+
+@router.get("/cooking_session/{session_id}", response_model=CookingSessionResponse)
 def get_cooking_session(session_id: int, db: Session = Depends(get_db)):
     """
     Get current status of a cooking session
     """
-    session = db.get(CookingSession, session_id)
-    if not session:
+    # One query, and only the recipe's title rather than its whole row
+    row = db.exec(
+        select(CookingSession, Recipe.title)
+        .join(Recipe, Recipe.id == CookingSession.recipe_id, isouter=True)
+        .where(CookingSession.id == session_id)
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Cooking session not found")
     
-    recipe = db.get(Recipe, session.recipe_id)
+    session, recipe_title = row
     
     return CookingSessionResponse(
         session_id=session.id,
-        recipe_title=recipe.title if recipe else "Unknown Recipe",
+        recipe_title=recipe_title or "Unknown Recipe",
         current_step=session.current_step,
         current_phase=session.current_phase,
         is_active=session.is_active,
@@ -242,29 +463,21 @@ def add_to_favorites(recipe_id: int, db: Session = Depends(get_db)):
     """
     Add a recipe to favorites
     """
-    recipe = db.get(Recipe, recipe_id)
-    if not recipe:
+    if not db.exec(select(exists().where(Recipe.id == recipe_id))).one():
         raise HTTPException(status_code=404, detail="Recipe not found")
     
-    # Check if already favorited
-    existing_favorite = db.exec(
-        select(Favorite).where(
-            Favorite.user_id == "default_user",
-            Favorite.recipe_id == recipe_id
-        )
-    ).first()
-    
-    if existing_favorite:
-        raise HTTPException(status_code=400, detail="Recipe already in favorites")
-    
-    favorite = Favorite(
-        user_id="default_user",
-        recipe_id=recipe_id
+    # Insert unless already favorited, in one atomic statement
+    insert = _DIALECT_INSERTS[db.get_bind().dialect.name]
+    result = db.exec(
+        insert(Favorite)
+        .values(user_id="default_user", recipe_id=recipe_id, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["user_id", "recipe_id"])
     )
-    
-    db.add(favorite)
     db.commit()
     
+    if result.rowcount == 0:
+        raise HTTPException(status_code=400, detail="Recipe already in favorites")
+    
     return {"message": "Recipe added to favorites"}
 
 @router.delete("/favorites/{recipe_id}")
@@ -287,21 +500,20 @@ def remove_from_favorites(recipe_id: int, db: Session = Depends(get_db)):
     
     return {"message": "Recipe removed from favorites"}
 
-@router.get("/favorites")
+@router.get("/favorites", response_model=RecipeSummaryList)
 def get_favorites(db: Session = Depends(get_db)):
     """
     Get all favorite recipes for the user
     """
-    favorites = db.exec(
-        select(Favorite).where(Favorite.user_id == "default_user")
+    # One join instead of a db.get per favorite
+    favorite_recipes = db.exec(
+        select(Recipe)
+        .options(_RECIPE_SUMMARY_COLUMNS)
+        .join(Favorite, Favorite.recipe_id == Recipe.id)
+        .where(Favorite.user_id == "default_user")
+        .order_by(Favorite.id)
     ).all()
     
-    favorite_recipes = []
-    for favorite in favorites:
-        recipe = db.get(Recipe, favorite.recipe_id)
-        if recipe:
-            favorite_recipes.append(recipe)
-    
     return {"recipes": favorite_recipes}
 
 @router.get("/favorites/check/{recipe_id}")
@@ -309,17 +521,19 @@ def check_if_favorite(recipe_id: int, db: Session = Depends(get_db)):
     """
     Check if a recipe is favorited by the user
     """
-    favorite = db.exec(
-        select(Favorite).where(
+    # EXISTS is answered from the (user_id, recipe_id) index without loading the row
+    is_favorite = db.exec(
+        select(exists().where(
             Favorite.user_id == "default_user",
             Favorite.recipe_id == recipe_id
-        )
-    ).first()
+        ))
+    ).one()
     
-    return {"is_favorite": favorite is not None}
+    return {"is_favorite": is_favorite}
 
 @router.post("/modify_recipe", response_model=RecipeModificationResponse)
-async def modify_recipe(request: RecipeModificationRequest, db: Session = Depends(get_db)):
+async def modify_recipe(request: RecipeModificationRequest, db: Session = Depends(get_db),
+                        recipe_modifier: RecipeModifier = Depends(get_recipe_modifier)):
     """
     Modify a recipe based on available ingredients, serving size, and dietary preferences
     """
@@ -329,44 +543,78 @@ async def modify_recipe(request: RecipeModificationRequest, db: Session = Depend
         if not recipe:
             raise HTTPException(status_code=404, detail="Recipe not found")
         
-        # Parse the recipe data
-        try:
-            ingredients_data = json.loads(recipe.ingredients) if recipe.ingredients else []
-            prep_phase_data = json.loads(recipe.prep_phase) if recipe.prep_phase else []
-            cook_phase_data = json.loads(recipe.cook_phase) if recipe.cook_phase else []
-            
-            original_recipe = OptimizedRecipe(
-                title=recipe.title,
-                ingredients=ingredients_data,
-                prep_phase=prep_phase_data,
-                cook_phase=cook_phase_data,
-                total_time=recipe.total_time,
-                prep_time=recipe.prep_time,
-                cook_time=recipe.cook_time,
-                servings=recipe.servings,
-                difficulty=recipe.difficulty
-            )
-        except (json.JSONDecodeError, TypeError) as e:
-            raise HTTPException(status_code=400, detail=f"Failed to parse recipe data: {str(e)}")
+        original_recipe = _to_optimized_recipe(recipe)
         
         # Prepare modification request
         modification_request = {
-            "available_ingredients": [ing.dict() for ing in request.available_ingredients],
+            "available_ingredients": request.available_ingredients,
             "target_servings": request.target_servings,
             "dietary_preferences": request.dietary_preferences or [],
             "substitution_preferences": request.substitution_preferences or {}
         }
         
         # Modify the recipe
-        modification_result = recipe_modifier.modify_recipe(original_recipe, modification_request)
+        modification_result = await recipe_modifier.amodify_recipe(original_recipe, modification_request)
         
         return modification_result
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to modify recipe: {str(e)}")
 
+@router.post("/modify_recipe/batch", response_model=List[RecipeModificationResponse])
+def modify_recipe_batch(request: RecipeModificationBatchRequest, db: Session = Depends(get_db),
+                        recipe_modifier: RecipeModifier = Depends(get_recipe_modifier)):
+    """
+    Apply several modifications to one recipe (e.g. one per dietary preference or serving count),
+    with a few variants per OpenAI call instead of one call each. Results are in request order.
+    """
+    recipe = db.get(Recipe, request.recipe_id)
+    if not recipe:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    
+    original_recipe = _to_optimized_recipe(recipe)
+    modification_requests = [
+        {
+            "available_ingredients": options.available_ingredients,
+            "target_servings": options.target_servings,
+            "dietary_preferences": options.dietary_preferences or [],
+            "substitution_preferences": options.substitution_preferences or {}
+        }
+        for options in request.modifications
+    ]
+    try:
+        return recipe_modifier.modify_recipe_batch(original_recipe, modification_requests)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to modify recipe: {str(e)}")
+
+@router.post("/modify_recipe/stream")
+async def stream_modify_recipe(request: RecipeModificationRequest, db: Session = Depends(get_db),
+                               recipe_modifier: RecipeModifier = Depends(get_recipe_modifier)):
+    """
+    Modify a recipe and stream the result as newline-delimited JSON events, so the UI can show
+    ingredients and prep steps while the rest of the recipe is still being generated
+    """
+    recipe = db.get(Recipe, request.recipe_id)
+    if not recipe:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    
+    original_recipe = _to_optimized_recipe(recipe)
+    modification_request = {
+        "available_ingredients": request.available_ingredients,
+        "target_servings": request.target_servings,
+        "dietary_preferences": request.dietary_preferences or [],
+        "substitution_preferences": request.substitution_preferences or {}
+    }
+    
+    async def event_stream():
+        async for event in recipe_modifier.astream_modified_recipe(original_recipe, modification_request):
+            yield orjson.dumps(event) + b"\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
 @router.post("/modify_recipe/{recipe_id}/save", response_model=OptimizedRecipe)
-async def save_modified_recipe(recipe_id: int, modification_request: RecipeModificationRequest, db: Session = Depends(get_db)):
+async def save_modified_recipe(recipe_id: int, modification_request: RecipeModificationRequest, db: Session = Depends(get_db),
+                               recipe_modifier: RecipeModifier = Depends(get_recipe_modifier)):
     """
     Modify a recipe and save the modified version to the database
     """
@@ -376,46 +624,28 @@ async def save_modified_recipe(recipe_id: int, modification_request: RecipeModif
         if not original_recipe:
             raise HTTPException(status_code=404, detail="Recipe not found")
         
-        # Parse the recipe data
-        try:
-            ingredients_data = json.loads(original_recipe.ingredients) if original_recipe.ingredients else []
-            prep_phase_data = json.loads(original_recipe.prep_phase) if original_recipe.prep_phase else []
-            cook_phase_data = json.loads(original_recipe.cook_phase) if original_recipe.cook_phase else []
-            
-            recipe_obj = OptimizedRecipe(
-                title=original_recipe.title,
-                ingredients=ingredients_data,
-                prep_phase=prep_phase_data,
-                cook_phase=cook_phase_data,
-                total_time=original_recipe.total_time,
-                prep_time=original_recipe.prep_time,
-                cook_time=original_recipe.cook_time,
-                servings=original_recipe.servings,
-                difficulty=original_recipe.difficulty
-            )
-        except (json.JSONDecodeError, TypeError) as e:
-            raise HTTPException(status_code=400, detail=f"Failed to parse recipe data: {str(e)}")
+        recipe_obj = _to_optimized_recipe(original_recipe)
         
         # Prepare modification request
         modification_data = {
-            "available_ingredients": [ing.dict() for ing in modification_request.available_ingredients],
+            "available_ingredients": modification_request.available_ingredients,
             "target_servings": modification_request.target_servings,
             "dietary_preferences": modification_request.dietary_preferences or [],
             "substitution_preferences": modification_request.substitution_preferences or {}
         }
         
         # Modify the recipe
-        modification_result = recipe_modifier.modify_recipe(recipe_obj, modification_data)
+        modification_result = await recipe_modifier.amodify_recipe(recipe_obj, modification_data)
         modified_recipe = modification_result.modified_recipe
         
         # Save the modified recipe to database
         new_recipe = Recipe(
             title=f"Modified {modified_recipe.title}",
             source_url=f"modified_from_{recipe_id}",
-            original_recipe=json.dumps({"original_recipe_id": recipe_id, "modifications": modification_result.modification_notes}),
-            prep_phase=json.dumps([step.dict() for step in modified_recipe.prep_phase]),
-            cook_phase=json.dumps([step.dict() for step in modified_recipe.cook_phase]),
-            ingredients=json.dumps([ing.dict() for ing in modified_recipe.ingredients]),
+            original_recipe={"original_recipe_id": recipe_id, "modifications": modification_result.modification_notes},
+            prep_phase=PREP_STEPS_ADAPTER.dump_python(modified_recipe.prep_phase, mode="json"),
+            cook_phase=COOK_STEPS_ADAPTER.dump_python(modified_recipe.cook_phase, mode="json"),
+            ingredients=INGREDIENTS_ADAPTER.dump_python(modified_recipe.ingredients, mode="json"),
             total_time=modified_recipe.total_time,
             prep_time=modified_recipe.prep_time,
             cook_time=modified_recipe.cook_time,
@@ -426,40 +656,23 @@ async def save_modified_recipe(recipe_id: int, modification_request: RecipeModif
         
         db.add(new_recipe)
         db.commit()
-        db.refresh(new_recipe)
         
         return modified_recipe
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to save modified recipe: {str(e)}")
 
-@router.get("/recipe/{recipe_id}/modification_suggestions")
-async def get_modification_suggestions(recipe_id: int, db: Session = Depends(get_db)):
-    """
-    Get AI-powered suggestions for modifying a recipe based on common dietary preferences and substitutions
-    """
-    try:
-        recipe = db.get(Recipe, recipe_id)
-        if not recipe:
-            raise HTTPException(status_code=404, detail="Recipe not found")
-        
-        # Parse ingredients
-        try:
-            ingredients_data = json.loads(recipe.ingredients) if recipe.ingredients else []
-        except (json.JSONDecodeError, TypeError):
-            ingredients_data = []
-        
-        # Use AI to analyze the recipe and suggest modifications
-        ingredients_text = "\n".join([
-            f"- {ing.get('name', '')}: {ing.get('amount', '')} {ing.get('unit', '')}"
-            for ing in ingredients_data
-        ])
-        
-        # Create AI prompt for modification suggestions
-        prompt = f"""
+def _suggestions_prompt(title: str, ingredients_data: List[dict]) -> str:
+    """Prompt for modification suggestions; it depends only on the title and ingredients, so it doubles as the cache key"""
+    ingredients_text = "\n".join([
+        f"- {ing.get('name', '')}: {ing.get('amount', '')} {ing.get('unit', '')}"
+        for ing in ingredients_data
+    ])
+    
+    return f"""
 You are a professional chef and nutritionist. Analyze this recipe and provide intelligent modification suggestions.
 
-RECIPE: {recipe.title}
+RECIPE: {title}
 INGREDIENTS:
 {ingredients_text}
 
@@ -500,32 +713,85 @@ Return your analysis as JSON with this structure:
 }}
 """
 
+def _fallback_suggestions(ingredients_data: List[dict]) -> Dict[str, Any]:
+    """Basic keyword analysis used when the AI suggestions fail"""
+    suggestions = {
+        "dietary_modifications": [],
+        "healthier_substitutions": [],
+        "common_alternatives": [],
+        "serving_size_options": [1, 2, 4, 6, 8, 10, 12],
+        "ai_insights": "AI analysis temporarily unavailable. Basic suggestions provided."
+    }
+    
+    for ingredient in ingredients_data:
+        ing_name = ingredient.get('name', '').lower()
+        if _MEAT_RE.search(ing_name):
+            suggestions["dietary_modifications"].append({
+                "type": "vegetarian",
+                "description": "Convert to vegetarian by substituting meat",
+                "affected_ingredients": [ingredient.get('name', '')],
+                "suggested_substitutes": ["tofu", "tempeh", "mushrooms"],
+                "cooking_adjustments": "Adjust cooking times for plant-based proteins"
+            })
+    return suggestions
+
+def _load_suggestion_inputs(recipe_id: int, db: Session) -> Tuple[str, List[dict]]:
+    """(title, ingredients) of a recipe, loading only those columns"""
+    recipe = db.get(Recipe, recipe_id, options=[load_only(Recipe.title, Recipe.ingredients)])
+    if not recipe:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return recipe.title, recipe.ingredients or []
+
+@router.get("/recipe/{recipe_id}/modification_suggestions")
+async def get_modification_suggestions(recipe_id: int, db: Session = Depends(get_db),
+                                       recipe_modifier: RecipeModifier = Depends(get_recipe_modifier)):
+    """
+    Get AI-powered suggestions for modifying a recipe based on common dietary preferences and substitutions
+    """
+    try:
+        title, ingredients_data = _load_suggestion_inputs(recipe_id, db)
+        
+        # Use AI to analyze the recipe and suggest modifications
+        prompt = _suggestions_prompt(title, ingredients_data)
+        suggestions = await _suggestions_cache.aget(prompt)
+        if suggestions is not None:
+            return suggestions
+        
         try:
-            response = recipe_modifier.llm.invoke(prompt)
-            suggestions = json.loads(response.content)
-        except (json.JSONDecodeError, Exception) as e:
+            response = await recipe_modifier.llm.ainvoke(prompt, config=llm_config("routes", "get_modification_suggestions"))
+            suggestions = orjson.loads(response.content)
+            await _suggestions_cache.aset(prompt, suggestions)
+        except Exception as e:
             # Fallback to basic analysis if AI fails
-            suggestions = {
-                "dietary_modifications": [],
-                "healthier_substitutions": [],
-                "common_alternatives": [],
-                "serving_size_options": [1, 2, 4, 6, 8, 10, 12],
-                "ai_insights": "AI analysis temporarily unavailable. Basic suggestions provided."
-            }
-            
-            # Basic analysis fallback
-            for ingredient in ingredients_data:
-                ing_name = ingredient.get('name', '').lower()
-                if any(meat in ing_name for meat in ['chicken', 'beef', 'pork', 'fish', 'meat']):
-                    suggestions["dietary_modifications"].append({
-                        "type": "vegetarian",
-                        "description": "Convert to vegetarian by substituting meat",
-                        "affected_ingredients": [ingredient.get('name', '')],
-                        "suggested_substitutes": ["tofu", "tempeh", "mushrooms"],
-                        "cooking_adjustments": "Adjust cooking times for plant-based proteins"
-                    })
+            suggestions = _fallback_suggestions(ingredients_data)
         
         return suggestions
         
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to get modification suggestions: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Failed to get modification suggestions: {str(e)}")
+
+@router.get("/recipe/{recipe_id}/modification_suggestions/stream")
+async def stream_modification_suggestions(recipe_id: int, db: Session = Depends(get_db),
+                                          recipe_modifier: RecipeModifier = Depends(get_recipe_modifier)):
+    """
+    Stream modification suggestions as newline-delimited JSON events: each suggestion as soon as the
+    model has written it, then a final "result" event with the complete suggestions
+    """
+    title, ingredients_data = _load_suggestion_inputs(recipe_id, db)
+    prompt = _suggestions_prompt(title, ingredients_data)
+    
+    async def event_stream():
+        suggestions = await _suggestions_cache.aget(prompt)
+        if suggestions is None:
+            stream = JsonArrayItemStream(_STREAMED_SUGGESTIONS)
+            try:
+                async for chunk in recipe_modifier.llm.astream(prompt, config=llm_config("routes", "stream_modification_suggestions")):
+                    for key, item in stream.feed(chunk.content):
+                        yield orjson.dumps({"type": _STREAMED_SUGGESTIONS[key], "data": item}) + b"\n"
+                suggestions = orjson.loads(stream.buffer)
+                await _suggestions_cache.aset(prompt, suggestions)
+            except Exception:
+                suggestions = _fallback_suggestions(ingredients_data)
+        yield orjson.dumps({"type": "result", "data": suggestions}) + b"\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
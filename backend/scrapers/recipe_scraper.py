@@ -1,52 +1,104 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
-import json
-from typing import Dict, List, Optional
+import asyncio
+import httpx
+import orjson
+from typing import Dict, List, Optional, Sequence
 import re
 from urllib.parse import urlparse
 
 class RecipeScraper:
+    # Common selectors for recipe elements, most specific first. They're tried one at a time
+    # rather than comma-joined, since a joined selector matches in document order, not priority order.
+    TITLE_SELECTORS = (
+        'h1[class*="recipe"]', 'h1[class*="title"]',
+        '.recipe-title', '.entry-title', 'h1'
+    )
+    
+    INGREDIENT_SELECTORS = (
+        '[class*="ingredient"]', '[class*="ingredients"]',
+        '.recipe-ingredients', '.ingredients-list'
+    )
+    
+    INSTRUCTION_SELECTORS = (
+        '[class*="instruction"]', '[class*="directions"]',
+        '.recipe-instructions', '.directions', 'ol li', 'ul li'
+    )
+    
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # Pooled session so repeat scrapes of a host reuse the connection and skip the TLS handshake
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50,
+                              max_retries=Retry(total=2, backoff_factor=0.2))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Created on first async scrape, so it binds to the running event loop
+        self._async_client: Optional[httpx.AsyncClient] = None
     
     def scrape_recipe(self, url: str) -> Dict:
         """
         Scrape recipe content from a given URL
         """
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+            return self._parse_html(response.content, url)
+        except Exception as e:
+            raise Exception(f"Failed to scrape recipe from {url}: {str(e)}")
+    
+    async def ascrape_recipe(self, url: str) -> Dict:
+        """
+        Async twin of scrape_recipe. The fetch doesn't block the event loop and reuses a
+        pooled client; the HTML parse is CPU work, so it runs in a worker thread.
+        """
+        try:
+            response = await self._get_async_client().get(url)
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Try to find recipe data in JSON-LD format (common on recipe sites)
-            recipe_data = self._extract_json_ld(soup)
-            if recipe_data:
-                return recipe_data
-            
-            # Fallback to HTML parsing
-            return self._extract_from_html(soup, url)
-            
+            return await asyncio.to_thread(self._parse_html, response.content, url)
         except Exception as e:
             raise Exception(f"Failed to scrape recipe from {url}: {str(e)}")
     
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers, timeout=10, follow_redirects=True,
+                transport=httpx.AsyncHTTPTransport(retries=2)
+            )
+        return self._async_client
+    
+    async def aclose(self) -> None:
+        """Close the pooled async client, if one was created"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+    
+    def _parse_html(self, html: bytes, url: str) -> Dict:
+        # lxml's C parser is several times faster than html.parser on large recipe pages
+        soup = BeautifulSoup(html, 'lxml')
+        
+        # Try to find recipe data in JSON-LD format (common on recipe sites)
+        recipe_data = self._extract_json_ld(soup)
+        if recipe_data:
+            return recipe_data
+        
+        # Fallback to HTML parsing
+        return self._extract_from_html(soup, url)
+    
     def _extract_json_ld(self, soup: BeautifulSoup) -> Optional[Dict]:
         """
         Extract recipe data from JSON-LD structured data
         """
-        json_scripts = soup.find_all('script', type='application/ld+json')
-        
-        for script in json_scripts:
+        for script in soup.find_all('script', type='application/ld+json'):
             try:
-                data = json.loads(script.string)
-                
-                # Handle both single objects and arrays
-                if isinstance(data, list):
-                    data = data[0]
-                
-                if data.get('@type') == 'Recipe':
+                # orjson only accepts exact str, not bs4's str subclass
+                data = self._find_recipe_node(orjson.loads(str(script.string or '')))
+                if data:
                     return {
                         'title': data.get('name', ''),
                         'description': data.get('description', ''),
@@ -58,39 +110,38 @@ class RecipeScraper:
                         'recipeYield': data.get('recipeYield', ''),
                         'author': data.get('author', {}).get('name', '') if isinstance(data.get('author'), dict) else data.get('author', '')
                     }
-            except (json.JSONDecodeError, KeyError):
+            except (orjson.JSONDecodeError, KeyError):
                 continue
         
         return None
     
+    def _find_recipe_node(self, data) -> Optional[Dict]:
+        """First Recipe object in a JSON-LD document, looking inside arrays and @graph"""
+        if isinstance(data, list):
+            for item in data:
+                node = self._find_recipe_node(item)
+                if node:
+                    return node
+            return None
+        if not isinstance(data, dict):
+            return None
+        node_type = data.get('@type')
+        if node_type == 'Recipe' or (isinstance(node_type, list) and 'Recipe' in node_type):
+            return data
+        return self._find_recipe_node(data.get('@graph', []))
+    
     def _extract_from_html(self, soup: BeautifulSoup, url: str) -> Dict:
         """
         Fallback HTML parsing for recipe content
         """
-        # Common selectors for recipe elements
-        title_selectors = [
-            'h1[class*="recipe"]', 'h1[class*="title"]', 
-            '.recipe-title', '.entry-title', 'h1'
-        ]
-        
-        ingredient_selectors = [
-            '[class*="ingredient"]', '[class*="ingredients"]',
-            '.recipe-ingredients', '.ingredients-list'
-        ]
-        
-        instruction_selectors = [
-            '[class*="instruction"]', '[class*="directions"]',
-            '.recipe-instructions', '.directions', 'ol li', 'ul li'
-        ]
-        
         # Extract title
-        title = self._extract_text_by_selectors(soup, title_selectors)
+        title = self._extract_text_by_selectors(soup, self.TITLE_SELECTORS)
         
         # Extract ingredients
-        ingredients = self._extract_ingredients(soup, ingredient_selectors)
+        ingredients = self._extract_ingredients(soup, self.INGREDIENT_SELECTORS)
         
         # Extract instructions
-        instructions = self._extract_instructions(soup, instruction_selectors)
+        instructions = self._extract_instructions(soup, self.INSTRUCTION_SELECTORS)
         
         return {
             'title': title or 'Untitled Recipe',
@@ -105,7 +156,7 @@ class RecipeScraper:
             'source_url': url
         }
     
-    def _extract_text_by_selectors(self, soup: BeautifulSoup, selectors: List[str]) -> str:
+    def _extract_text_by_selectors(self, soup: BeautifulSoup, selectors: Sequence[str]) -> str:
         """Extract text using multiple CSS selectors"""
         for selector in selectors:
             element = soup.select_one(selector)
@@ -113,7 +164,7 @@ class RecipeScraper:
                 return element.get_text(strip=True)
         return ''
     
-    def _extract_ingredients(self, soup: BeautifulSoup, selectors: List[str]) -> List[str]:
+    def _extract_ingredients(self, soup: BeautifulSoup, selectors: Sequence[str]) -> List[str]:
         """Extract ingredients list"""
         ingredients = []
         
@@ -134,7 +185,7 @@ class RecipeScraper:
         
         return ingredients
     
-    def _extract_instructions(self, soup: BeautifulSoup, selectors: List[str]) -> List[str]:
+    def _extract_instructions(self, soup: BeautifulSoup, selectors: Sequence[str]) -> List[str]:
         """Extract cooking instructions"""
         instructions = []
         
@@ -24,6 +24,9 @@ import { useParams } from 'react-router-dom';
 import axios from 'axios';
 import Timer from '../components/Timer';
 
+// Mirrors the backend's ingredient removal pattern
+const REMOVE_PATTERN = /remove (.+?)(?: from|$)/;
+
 interface SessionData {
   session_id: number;
   recipe_title: string;
@@ -55,6 +58,8 @@ const CookingSession: React.FC = () => {
     isWakeWordModeRef.current = isWakeWordMode;
   }, [isWakeWordMode]);
 
+  const lastPrefetchRef = useRef<string | null>(null);
+
   const { speak, cancel, voices } = useSpeechSynthesis();
   const [timeoutId, setTimeoutId] = useState<NodeJS.Timeout | null>(null);
   const [timestamp, setTimestamp] = useState(0);
@@ -89,6 +94,16 @@ const CookingSession: React.FC = () => {
           }, 500);*/
           
         console.log('in else');
+        // Let the backend start on LLM-backed answers (ingredient removal) before the command is final.
+        // Interim results repeat the same words, so only post when the heard ingredient changes.
+        const removeMatch = speechText.match(REMOVE_PATTERN);
+        if (sessionId && removeMatch && removeMatch[1] !== lastPrefetchRef.current) {
+          lastPrefetchRef.current = removeMatch[1];
+          axios.post('http://localhost:8000/api/voice_command/prefetch', {
+            command: speechText,
+            session_id: parseInt(sessionId),
+          }).catch(() => {});
+        }
         // Reset timeout when we get new speech input during command mode
         const newTimeoutId = setTimeout(() => {
           console.log('RESETER');
@@ -19,11 +19,19 @@ if __name__ == "__main__":
         print("Please set these in your .env file or environment")
         print("You can copy env.example to .env and fill in your values")
     
-    # Run the FastAPI server
+    # Auto-reload is for development only, and can't be combined with multiple workers
+    production = os.getenv("ENV") == "production"
+    
+    # "auto" picks uvloop and the httptools parser when they're installed (uvicorn[standard], except
+    # uvloop on Windows) and falls back to asyncio and h11 otherwise
     uvicorn.run(
         "backend.app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=not production,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")) if production else None,
+        loop="auto",
+        http="auto",
+        timeout_keep_alive=30,
         log_level="info"
     )
\ No newline at end of file
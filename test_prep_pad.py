@@ -3,17 +3,45 @@
 Test script for Prep Pad cooking assistant
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import orjson
+import os
+import sys
 import time
 
 BASE_URL = "http://localhost:8000"
+# (connect, read) seconds, so a hung server fails the probe instead of blocking the run
+TIMEOUT = (3, 15)
+
+# One session for every probe, so requests reuse a kept-alive connection instead of reconnecting
+SESSION = requests.Session()
+# Transient gateway errors are retried with backoff; urllib3 only retries idempotent methods on
+# status codes, so a POST that advances a cooking session is never replayed
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+))
+# Bodies are encoded and decoded with orjson rather than requests' stdlib json
+SESSION.headers.update({"Content-Type": "application/json", "Accept": "application/json"})
+
+# (command, description) probes, sent in order as one batch
+_VOICE_COMMANDS = (
+    ("next", "Move to next step"),
+    ("repeat", "Repeat current step"),
+    ("what prep", "Show prep phase"),
+    ("time", "Get remaining time"),
+    ("ingredients", "List ingredients")
+)
+_VOICE_COMMAND_NAMES = [cmd for cmd, _ in _VOICE_COMMANDS]
 
 def test_server_health():
     """Test if server is running"""
     try:
-        response = requests.get(f"{BASE_URL}/")
+        response = SESSION.get(f"{BASE_URL}/", timeout=(1, 2))
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"✅ Server is running: {data['message']}")
             return True
         else:
@@ -31,12 +59,12 @@ def test_recipe_parsing():
     test_url = "https://www.allrecipes.com/recipe/213742/cheesy-chicken-broccoli-casserole/"
     
     try:
-        response = requests.post(f"{BASE_URL}/api/parse_recipe", 
-                               json={"url": test_url},
-                               timeout=30)
+        response = SESSION.post(f"{BASE_URL}/api/parse_recipe", 
+                               data=orjson.dumps({"url": test_url}),
+                               timeout=(3, 30))
         
         if response.status_code == 200:
-            recipe = response.json()
+            recipe = orjson.loads(response.content)
             print(f"✅ Recipe parsed successfully!")
             print(f"   Title: {recipe['title']}")
             print(f"   Prep steps: {len(recipe['prep_phase'])}")
@@ -59,10 +87,10 @@ def test_get_recipes():
     print("\n🧪 Testing get recipes...")
     
     try:
-        response = requests.get(f"{BASE_URL}/api/recipes")
+        response = SESSION.get(f"{BASE_URL}/api/recipes", timeout=TIMEOUT)
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             recipes = data.get('recipes', [])
             print(f"✅ Found {len(recipes)} recipes")
             return len(recipes) > 0
@@ -79,10 +107,10 @@ def test_cooking_session():
     
     try:
         # Start cooking session (assuming recipe ID 1 exists)
-        response = requests.post(f"{BASE_URL}/api/start_cooking/1")
+        response = SESSION.post(f"{BASE_URL}/api/start_cooking/1", timeout=TIMEOUT)
         
         if response.status_code == 200:
-            session = response.json()
+            session = orjson.loads(response.content)
             print(f"✅ Cooking session started!")
             print(f"   Session ID: {session['session_id']}")
             print(f"   Recipe: {session['recipe_title']}")
@@ -101,26 +129,19 @@ def test_voice_commands(session_id):
     """Test voice command processing"""
     print("\n🧪 Testing voice commands...")
     
-    commands = [
-        ("next", "Move to next step"),
-        ("repeat", "Repeat current step"),
-        ("what prep", "Show prep phase"),
-        ("time", "Get remaining time"),
-        ("ingredients", "List ingredients")
-    ]
-    
-    for cmd, description in commands:
-        try:
-            response = requests.post(f"{BASE_URL}/api/voice_command",
-                                   json={"command": cmd, "session_id": session_id})
-            
-            if response.status_code == 200:
-                result = response.json()
+    # All commands in one round trip; the server runs them in order
+    try:
+        response = SESSION.post(f"{BASE_URL}/api/voice_command_batch",
+                               data=orjson.dumps({"commands": _VOICE_COMMAND_NAMES, "session_id": session_id}),
+                               timeout=TIMEOUT)
+        
+        if response.status_code == 200:
+            for (cmd, description), result in zip(_VOICE_COMMANDS, orjson.loads(response.content)["responses"]):
                 print(f"✅ '{cmd}': {result['response'][:50]}...")
-            else:
-                print(f" '{cmd}' failed: {response.status_code}")
-        except Exception as e:
-            print(f" '{cmd}' error: {str(e)}")
+        else:
+            print(f" Voice commands failed: {response.status_code}")
+    except Exception as e:
+        print(f" Voice commands error: {str(e)}")
 
 def main():
     """Run all tests"""
@@ -128,15 +149,22 @@ def main():
     print("=" * 40)
     
     # Test 1: Server health
+    # Output is block-buffered when piped (CI, tee); flush at section boundaries so progress shows as it happens
     if not test_server_health():
         return
+    sys.stdout.flush()
     
     # Test 2: Get existing recipes
     has_recipes = test_get_recipes()
+    sys.stdout.flush()
     
     # Test 3: Recipe parsing (optional - might take time)
     print("\n⚠️  Recipe parsing test (optional - may take 30+ seconds)")
-    user_input = input("Run recipe parsing test? (y/n): ").lower().strip()
+    # RUN_PARSE_TEST=y/n answers up front; unattended runs (CI, pipes) skip it instead of blocking on the prompt
+    user_input = os.getenv("RUN_PARSE_TEST")
+    if user_input is None:
+        user_input = input("Run recipe parsing test? (y/n): ") if sys.stdin.isatty() else "n"
+    user_input = user_input.lower().strip()
     if user_input == 'y':
         recipe = test_recipe_parsing()
         if recipe:
@@ -149,6 +177,7 @@ def main():
         # Test 5: Voice commands (only if session started)
         if session_id:
             test_voice_commands(session_id)
+            sys.stdout.flush()
     else:
         print("\n⚠️  Skipping cooking session tests - no recipes found")
         print("   Try running recipe parsing test first")
@@ -160,4 +189,5 @@ def main():
     print("   - Deploy to production when ready")
 
 if __name__ == "__main__":
-    main()
+    with SESSION:
+        main()
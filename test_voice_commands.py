@@ -3,9 +3,36 @@
 Test script to create a sample recipe and cooking session for testing voice commands
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import orjson
+import sys
 
 BASE_URL = "http://localhost:8000"
+# (connect, read) seconds, so a hung server fails the probe instead of blocking the run
+TIMEOUT = (3, 15)
+
+# One session for every probe, so requests reuse a kept-alive connection instead of reconnecting
+SESSION = requests.Session()
+# Transient gateway errors are retried with backoff; urllib3 only retries idempotent methods on
+# status codes, so a POST that advances a cooking session is never replayed
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+))
+# Bodies are encoded and decoded with orjson rather than requests' stdlib json
+SESSION.headers.update({"Content-Type": "application/json", "Accept": "application/json"})
+
+# (command, description) probes, sent in order as one batch
+_VOICE_COMMANDS = (
+    ("next", "Move to next step"),
+    ("repeat", "Repeat current step"),
+    ("what prep", "Show prep phase"),
+    ("time", "Get remaining time"),
+    ("ingredients", "List ingredients")
+)
+_VOICE_COMMAND_NAMES = [cmd for cmd, _ in _VOICE_COMMANDS]
 
 def create_test_recipe():
     """Create a test recipe"""
@@ -37,12 +64,13 @@ def create_test_recipe():
     }
     
     try:
-        response = requests.post(f"{BASE_URL}/api/create_recipe", 
-                               json=test_recipe_data)
+        response = SESSION.post(f"{BASE_URL}/api/create_recipe", 
+                               data=orjson.dumps(test_recipe_data),
+                               timeout=TIMEOUT)
         
         if response.status_code == 200:
             print("✅ Test recipe created successfully!")
-            return response.json()
+            return orjson.loads(response.content)
         else:
             print(f"❌ Failed to create test recipe: {response.status_code}")
             print(f"Error: {response.text}")
@@ -54,10 +82,10 @@ def create_test_recipe():
 def start_test_cooking_session():
     """Start a test cooking session"""
     try:
-        response = requests.post(f"{BASE_URL}/api/start_cooking/1")
+        response = SESSION.post(f"{BASE_URL}/api/start_cooking/1", timeout=TIMEOUT)
         
         if response.status_code == 200:
-            session = response.json()
+            session = orjson.loads(response.content)
             print(f"✅ Test cooking session started!")
             print(f"   Session ID: {session['session_id']}")
             print(f"   Recipe: {session['recipe_title']}")
@@ -74,29 +102,22 @@ def start_test_cooking_session():
 
 def test_voice_commands(session_id):
     """Test voice commands"""
-    commands = [
-        ("next", "Move to next step"),
-        ("repeat", "Repeat current step"),
-        ("what prep", "Show prep phase"),
-        ("time", "Get remaining time"),
-        ("ingredients", "List ingredients")
-    ]
-    
     print(f"\n🧪 Testing voice commands for session {session_id}...")
     
-    for cmd, description in commands:
-        try:
-            response = requests.post(f"{BASE_URL}/api/voice_command",
-                                   json={"command": cmd, "session_id": session_id})
-            
-            if response.status_code == 200:
-                result = response.json()
+    # All commands in one round trip; the server runs them in order
+    try:
+        response = SESSION.post(f"{BASE_URL}/api/voice_command_batch",
+                               data=orjson.dumps({"commands": _VOICE_COMMAND_NAMES, "session_id": session_id}),
+                               timeout=TIMEOUT)
+        
+        if response.status_code == 200:
+            for (cmd, description), result in zip(_VOICE_COMMANDS, orjson.loads(response.content)["responses"]):
                 print(f"✅ '{cmd}': {result['response']}")
-            else:
-                print(f"❌ '{cmd}' failed: {response.status_code}")
-                print(f"   Error: {response.text}")
-        except Exception as e:
-            print(f"❌ '{cmd}' error: {str(e)}")
+        else:
+            print(f"❌ Voice commands failed: {response.status_code}")
+            print(f"   Error: {response.text}")
+    except Exception as e:
+        print(f"❌ Voice commands error: {str(e)}")
 
 def main():
     """Run all tests"""
@@ -106,6 +127,8 @@ def main():
     # Test 1: Create test recipe
     print("\n1. Creating test recipe...")
     recipe = create_test_recipe()
+    # Output is block-buffered when piped (CI, tee); flush at section boundaries so progress shows as it happens
+    sys.stdout.flush()
     
     if not recipe:
         print("❌ Cannot proceed without a test recipe")
@@ -114,6 +137,7 @@ def main():
     # Test 2: Start cooking session
     print("\n2. Starting cooking session...")
     session_id = start_test_cooking_session()
+    sys.stdout.flush()
     
     if not session_id:
         print("❌ Cannot proceed without a cooking session")
@@ -127,4 +151,5 @@ def main():
     print(f"\n🎯 You can now test the frontend at: http://localhost:3000/cooking/{session_id}")
 
 if __name__ == "__main__":
-    main()
+    with SESSION:
+        main()